@@ -0,0 +1,45 @@
+import timeit
+
+from nostmack_hub.led_effect.blorp_effect import SEED_FREQUENCY, BlorpEffect, SeedConfig
+from nostmack_hub.led_effect.frame_pool import FramePool
+
+COLOURS = [(37, 255, 90), (255, 0, 0), (0, 255, 255), (255, 80, 0), (180, 0, 255)]
+GEAR_VALUES = [0, 100, 200, 254, 255]
+LED_COUNTS = [840, 10_000, 50_000]
+# roughly the memento config's ~110 seeds, and a few thousand
+SEED_COUNTS = [110, 3_000]
+DELTA_TIME = 20
+REPEATS = 50
+
+
+def main():
+    for led_count in LED_COUNTS:
+        for seed_count in SEED_COUNTS:
+            config = SeedConfig(
+                influence_size=31,
+                ramp_time=500,
+                dissapate_time=seed_count * SEED_FREQUENCY - 500,
+            )
+            effect = BlorpEffect(COLOURS, led_count, config)
+            frames = FramePool(led_count)
+            out = frames.acquire()
+
+            # fill up on seeds
+            for _ in range(seed_count * SEED_FREQUENCY // DELTA_TIME):
+                effect.calculate_into(GEAR_VALUES, DELTA_TIME, out, frames)
+
+            seconds = min(
+                timeit.repeat(
+                    lambda: effect.calculate_into(GEAR_VALUES, DELTA_TIME, out, frames),
+                    number=REPEATS,
+                    repeat=5,
+                )
+            )
+            print(
+                f"{led_count:>6} LEDs, {effect.seed_count:>5} seeds: "
+                f"{seconds / REPEATS * 1e3:8.3f} ms/frame"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import timeit
+
+import numpy as np
+
+from nostmack_hub.dnrgb import DnrgbEncoder, dnrgb_packets
+
+LED_COUNTS = [840, 5_000, 30_000]
+REPEATS = 200
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    for led_count in LED_COUNTS:
+        frame = rng.integers(0, 256, (led_count, 3), dtype=np.uint8)
+        colours = list(map(tuple, frame.tolist()))
+        encoder = DnrgbEncoder(led_count)
+
+        results = {
+            "dnrgb_packets (tuples)": lambda: list(dnrgb_packets(colours)),
+            "dnrgb_packets (array)": lambda: list(dnrgb_packets(frame)),
+            "DnrgbEncoder": lambda: encoder.encode(frame),
+        }
+
+        print(f"{led_count} LEDs:")
+        for name, fn in results.items():
+            seconds = min(timeit.repeat(fn, number=REPEATS, repeat=5)) / REPEATS
+            print(f"  {name:<24} {seconds * 1e6:10.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+import socket
+import time
+
+from nostmack_hub.esp_listener import (
+    ESP_MESSAGE,
+    EspBatch,
+    bind_esp_socket,
+    listen_to_esps,
+    listen_to_esps_batched,
+)
+from nostmack_hub.gear import Gear
+
+ESP_COUNT = 5
+DURATION = 2
+
+
+def blast(address, stop):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        messages = [ESP_MESSAGE.pack(id, 1) for id in range(ESP_COUNT)]
+        while not stop.is_set():
+            for message in messages:
+                sock.sendto(message, address)
+
+
+async def ingest(events, gears):
+    datagrams = 0
+    deadline = time.perf_counter() + DURATION
+    async for event in events:
+        match event:
+            case EspBatch(counts=counts):
+                for id, count in counts.items():
+                    gears[id].turned(count)
+                datagrams += sum(event.datagrams.values())
+            case (id, count):
+                gears[id].turned(count)
+                datagrams += 1
+        if time.perf_counter() > deadline:
+            return datagrams / DURATION
+
+
+async def main():
+    for name, listen in [
+        ("per datagram", listen_to_esps),
+        ("batched", listen_to_esps_batched),
+    ]:
+        gears = [Gear(1) for _ in range(ESP_COUNT)]
+        stop = multiprocessing.Event()
+        listener = bind_esp_socket(("127.0.0.1", 0))
+        address = listener.getsockname()
+        events = listen(sock=listener)
+        # bind before the sender starts
+        first = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0.1)
+        # a separate process, so the sender doesn't compete for the GIL
+        sender = multiprocessing.Process(target=blast, args=(address, stop))
+        sender.start()
+        try:
+            await first
+            rate = await ingest(events, gears)
+        finally:
+            stop.set()
+            sender.join()
+            await events.aclose()
+        print(f"{name:<14} {rate:10.0f} events/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from nostmack_hub import pygame_mixer
+from nostmack_hub.sound_cache import NoSoundCache, SoundCache
+
+SOUND_COUNT = 50
+SOUND_SECONDS = 10
+
+
+# Without a sound directory argument, a pool of generated WAVs is used. Those
+# decode much faster than OGGs, so run against the real pool for real numbers.
+def generated_pool(directory: Path) -> Path:
+    pool = directory / "pool"
+    pool.mkdir()
+    rng = np.random.default_rng(0)
+    for i in range(SOUND_COUNT):
+        samples = rng.integers(-8000, 8000, 22050 * SOUND_SECONDS, dtype=np.int16)
+        with wave.open(str(pool / f"sound{i}.wav"), "wb") as file:
+            file.setnchannels(1)
+            file.setsampwidth(2)
+            file.setframerate(22050)
+            file.writeframes(samples.tobytes())
+    return pool
+
+
+def load_all(cache, pool: Path) -> float:
+    start = time.perf_counter()
+    sounds = list(map(cache.load, pool.iterdir()))
+    assert len(sounds) > 0
+    return time.perf_counter() - start
+
+
+def main():
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    with tempfile.TemporaryDirectory() as directory, pygame_mixer.init():
+        directory = Path(directory)
+        pool = Path(sys.argv[1]) if len(sys.argv) > 1 else generated_pool(directory)
+        cache = SoundCache(directory / "cache")
+
+        print(f"{len(list(pool.iterdir()))} sounds from {pool}:")
+        print(f"  decoded          {load_all(NoSoundCache(), pool):8.3f} s")
+        print(f"  cache, first run {load_all(cache, pool):8.3f} s")
+        print(f"  cache, later run {load_all(cache, pool):8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import socket
+import time
+from pathlib import Path
+
+from benchmarks.sound_startup import generated_pool
+from nostmack_hub import pygame_mixer
+from nostmack_hub.esp_listener import (
+    ESP_MESSAGE,
+    EspBatch,
+    bind_esp_socket,
+    listen_to_esps_batched,
+)
+from nostmack_hub.gear import GearBank
+from nostmack_hub.sound_cache import NoSoundCache
+from nostmack_hub.sound_loader import SoundLoader
+from nostmack_hub.sounds import Sounds
+
+
+# an ESP turning its gear every 10ms, from before the hub starts
+def turn(address, stop: threading.Event):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        while not stop.wait(0.01):
+            sock.sendto(ESP_MESSAGE.pack(0, 1), address)
+
+
+async def first_turn(gears: GearBank, listener: socket.socket):
+    async for batch in listen_to_esps_batched(sock=listener):
+        if isinstance(batch, EspBatch) and batch.counts:
+            gears.turned([0], [batch.counts[0]])
+            return
+
+
+# for the finale and the ding, which load the same way as the pool
+def stand_in(pool: Path) -> Path:
+    return next(pool.iterdir())
+
+
+async def upfront(pool: Path, listener: socket.socket) -> float:
+    start = time.perf_counter()
+    cache = NoSoundCache()
+    gears = GearBank([5])
+    cache.load(stand_in(pool))
+    Sounds(
+        list(gears), list(map(cache.load, pool.iterdir())), cache.load(stand_in(pool))
+    )
+    await first_turn(gears, listener)
+    return time.perf_counter() - start
+
+
+async def background(pool: Path, listener: socket.socket) -> float:
+    start = time.perf_counter()
+    gears = GearBank([5])
+    with SoundLoader(NoSoundCache().load) as loader:
+        loader.load_later(stand_in(pool))
+        sounds = Sounds(list(gears), [])
+        loader.load_later(stand_in(pool), sounds.set_ding)
+        for path in pool.iterdir():
+            loader.load_later(path, sounds.add_sound)
+        await first_turn(gears, listener)
+        return time.perf_counter() - start
+
+
+def main():
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    with tempfile.TemporaryDirectory() as directory, pygame_mixer.init():
+        pool = (
+            Path(sys.argv[1]) if len(sys.argv) > 1 else generated_pool(Path(directory))
+        )
+        print(f"first ESP event accepted, {len(list(pool.iterdir()))} sounds:")
+        for name, start in [("up front", upfront), ("background", background)]:
+            # any free port, turned before the hub starts reading it
+            listener = bind_esp_socket(("127.0.0.1", 0))
+            stop = threading.Event()
+            sender = threading.Thread(target=turn, args=(listener.getsockname(), stop))
+            sender.start()
+            try:
+                latency = asyncio.run(start(pool, listener))
+            finally:
+                stop.set()
+                sender.join()
+            print(f"  loading {name:<10} {latency:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
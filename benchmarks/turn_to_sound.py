@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import time
+
+import numpy as np
+import pygame.mixer
+
+from nostmack_hub import pygame_mixer
+from nostmack_hub.esp_listener import (
+    ESP_MESSAGE,
+    bind_esp_socket,
+    listen_to_esps_batched,
+)
+from nostmack_hub.gear import MAX_VALUE, GearBank
+from nostmack_hub.machine import Machine
+from nostmack_hub.sound_mixer import QUEUED_BLOCKS, SoftwareMixer
+from nostmack_hub.sounds import Sounds
+
+ESP_ID = 7
+# a gear of sensitivity 1 is fully charged after this many turns
+MAX_TRIALS = MAX_VALUE
+
+
+class TimedSound:
+    # Records when each volume change is handed to the mixer.
+    def __init__(self, sound):
+        self.sound = sound
+        self.changed_at: list[float] = []
+
+    def play(self, loops=0):
+        self.sound.play(loops=loops)
+
+    def set_volume(self, volume):
+        self.sound.set_volume(volume)
+        if volume != 0:
+            self.changed_at.append(time.perf_counter())
+
+    def fadeout(self, time):
+        self.sound.fadeout(time)
+
+
+async def measure(trials: int, mixer: SoftwareMixer | None) -> list[float]:
+    samples = np.zeros((44100, pygame.mixer.get_init()[2]), dtype=np.int16)
+    sound = pygame.mixer.Sound(buffer=samples.tobytes())
+    sound = TimedSound(mixer.voice(sound) if mixer is not None else sound)
+
+    # sensitivity 1, so each turn changes the volume
+    gears = GearBank([1])
+    # any free port, so a running hub or another run doesn't get in the way
+    listener = bind_esp_socket(("127.0.0.1", 0))
+    address = listener.getsockname()
+    machine = Machine(
+        esp_mapping={ESP_ID: gears[0]},
+        esp_events=listen_to_esps_batched(sock=listener),
+        wled=None,
+        effect=None,
+        sounds=Sounds(list(gears), [sound]),
+        finale=None,
+        finale_duration=0,
+    )
+
+    latencies = []
+    async with asyncio.TaskGroup() as tg:
+        tasks = [
+            tg.create_task(machine.update_effects()),
+            tg.create_task(machine.sounds.play_sounds()),
+        ]
+        if mixer is not None:
+            tasks.append(tg.create_task(mixer.run()))
+        await asyncio.sleep(0.1)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for _ in range(trials):
+                changes = len(sound.changed_at)
+                sent_at = time.perf_counter()
+                sock.sendto(ESP_MESSAGE.pack(ESP_ID, 1), address)
+                while len(sound.changed_at) == changes:
+                    await asyncio.sleep(0)
+                latencies.append(sound.changed_at[-1] - sent_at)
+                # as far apart as real turns
+                await asyncio.sleep(0.01)
+
+        for task in tasks:
+            task.cancel()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time from an ESP datagram to its volume change reaching the mixer"
+    )
+    parser.add_argument("--latency", choices=pygame_mixer.BUFFER_SIZES)
+    parser.add_argument("--buffer", type=int)
+    parser.add_argument("--frequency", type=int, default=pygame_mixer.FREQUENCY)
+    parser.add_argument("--software-mixer", action="store_true")
+    parser.add_argument(
+        "--trials",
+        type=int,
+        default=200,
+        help=f"turns to time, at most {MAX_TRIALS} as each one charges the gear further",
+    )
+    args = parser.parse_args()
+    if not 1 <= args.trials <= MAX_TRIALS:
+        parser.error(f"--trials must be between 1 and {MAX_TRIALS}")
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    buffer = pygame_mixer.buffer_size(args.latency, args.buffer)
+    with pygame_mixer.init(frequency=args.frequency, buffer=buffer):
+        mixer = SoftwareMixer() if args.software_mixer else None
+        latencies = asyncio.run(measure(args.trials, mixer))
+
+    # what the mixer buffers after the change, not measurable with the dummy driver
+    buffered = buffer / args.frequency
+    if mixer is not None:
+        # the playing and the queued sound
+        buffered += 2 * QUEUED_BLOCKS * mixer.block_size / args.frequency
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"buffer {buffer} at {args.frequency} Hz, {len(ms)} turns:")
+    print(f"  datagram to mixer  median {statistics.median(ms):6.2f} ms")
+    print(f"                     max    {max(ms):6.2f} ms")
+    print(f"  plus buffered audio       {buffered * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
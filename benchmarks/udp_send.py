@@ -0,0 +1,51 @@
+import asyncio
+import socket
+import time
+
+from nostmack_hub.dnrgb import HEADER_SIZE, MAX_LEDS_PER_PACKET
+from nostmack_hub.udp import connect, sender
+
+PACKETS_PER_FRAME = [1, 10, 60]
+FRAMES = 500
+
+
+async def per_packet(addr, packets):
+    async with connect(addr) as socket:
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            for packet in packets:
+                await socket.send(packet)
+        return time.perf_counter() - start
+
+
+async def batched(addr, packets):
+    async with sender([addr]) as socket:
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            await socket.send_all(packets)
+        return time.perf_counter() - start
+
+
+async def main():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 24)
+    receiver.bind(("127.0.0.1", 0))
+    addr = receiver.getsockname()
+
+    packet = bytes(HEADER_SIZE + MAX_LEDS_PER_PACKET * 3)
+
+    for count in PACKETS_PER_FRAME:
+        packets = [packet] * count
+        print(f"{count} packets per frame:")
+        for name, send in [("per packet", per_packet), ("batched", batched)]:
+            seconds = await send(addr, packets) / FRAMES
+            print(
+                f"  {name:<12} {seconds * 1e6:8.1f} us/frame"
+                f"  {count / seconds:10.0f} packets/s"
+            )
+
+    receiver.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import asyncio
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+
+from nostmack_hub.wled import WledJsonApi
+
+TRANSITIONS = 200
+
+
+async def new_session_per_request(address: str, state: dict):
+    async with aiohttp.ClientSession(
+        base_url=f"http://{address}/json/state/",
+        raise_for_status=True,
+    ) as session:
+        async with session.post("", json=state):
+            pass
+
+
+async def measure(post_state, address):
+    start = time.perf_counter()
+    for i in range(TRANSITIONS):
+        await post_state(address, {"ps": i % 2 + 1, "lor": 1})
+    return (time.perf_counter() - start) / TRANSITIONS
+
+
+async def main():
+    async def state(request):
+        await request.json()
+        return web.json_response({"success": True})
+
+    app = web.Application()
+    app.router.add_post("/json/state/", state)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sock = socket.socket()
+    sock.bind(("localhost", 0))
+    await web.SockSite(runner, sock).start()
+    address = "localhost:{}".format(sock.getsockname()[1])
+
+    try:
+        before = await measure(new_session_per_request, address)
+        api = WledJsonApi()
+        try:
+            after = await measure(api.post_state, address)
+        finally:
+            await api.close()
+    finally:
+        await runner.cleanup()
+
+    print(f"new session per request: {before * 1e3:6.2f} ms/transition")
+    print(f"persistent session:      {after * 1e3:6.2f} ms/transition")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
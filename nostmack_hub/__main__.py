@@ -3,17 +3,27 @@ from contextlib import contextmanager
 from pathlib import Path
 
 import pygame.mixer
-from pygame.mixer import Sound
 
 from nostmack_hub import esp_diagnostics, esp_listener, pygame_mixer
 from nostmack_hub.cancel_on_signal import cancel_on_signal
+from nostmack_hub.frame_scheduler import FrameScheduler
 from nostmack_hub.led_effect import flowing_memento
-from nostmack_hub.gear import Gear
+from nostmack_hub.gear import GearBank
 from nostmack_hub.led_effect.gamma_correction import GammaCorrection
+from nostmack_hub.led_effect.power_limit import PowerLimit
 from nostmack_hub.led_value_calculator import LedEffectFixedCount
 from nostmack_hub.machine import Machine
+from nostmack_hub.sound_cache import sound_cache
+from nostmack_hub.sound_loader import SoundLoader
+from nostmack_hub.sound_mixer import SoftwareMixer
 from nostmack_hub.sounds import Sounds
-from nostmack_hub.wled import Wled
+from nostmack_hub.wled import (
+    UPDATE_FREQUENCY,
+    Wled,
+    WledCluster,
+    WledSegment,
+    check_segments,
+)
 
 
 def checked_getenv(var):
@@ -25,60 +35,173 @@ def checked_getenv(var):
     return value
 
 
-# example: lights.local
-WLED_ADDRESS = checked_getenv("WLED_ADDRESS")
+def optional_getenv(var):
+    import os
+
+    return os.getenv(var)
+
+
+def optional_int_getenv(var):
+    value = optional_getenv(var)
+    if value is None:
+        return None
+    return int(value)
+
+
+def optional_float_getenv(var):
+    value = optional_getenv(var)
+    if value is None:
+        return None
+    return float(value)
+
+
+def optional_list_getenv(var):
+    value = optional_getenv(var)
+    if not value:
+        return []
+    return value.split(",")
+
+
+WLED_SEGMENTS = optional_getenv("WLED_SEGMENTS")
+# example: lights.local, not needed when WLED_SEGMENTS is set
+if WLED_SEGMENTS is None:
+    WLED_ADDRESS = checked_getenv("WLED_ADDRESS")
+else:
+    WLED_ADDRESS = optional_getenv("WLED_ADDRESS")
 LED_COUNT = int(checked_getenv("LED_COUNT"))
 GEARS = checked_getenv("GEARS")
 COLOURS = checked_getenv("COLOURS")
 FINALE_DURATION = int(checked_getenv("FINALE_DURATION"))
+WLED_MIRROR_ADDRESSES = optional_list_getenv("WLED_MIRROR_ADDRESSES")
+if WLED_SEGMENTS is not None and WLED_MIRROR_ADDRESSES:
+    raise ValueError(
+        "WLED_MIRROR_ADDRESSES can't be used with WLED_SEGMENTS, "
+        "list the mirrors as segments instead"
+    )
+WLED_KEYFRAME_INTERVAL = optional_int_getenv("WLED_KEYFRAME_INTERVAL")
+RENDER_IN_THREAD = bool(optional_int_getenv("RENDER_IN_THREAD"))
+BRIGHTNESS = optional_float_getenv("BRIGHTNESS")
+if BRIGHTNESS is None:
+    BRIGHTNESS = 1.0
+WHITE_BALANCE = tuple(map(float, optional_list_getenv("WHITE_BALANCE") or [1, 1, 1]))
+if len(WHITE_BALANCE) != 3:
+    raise ValueError(
+        f"WHITE_BALANCE needs a red, green and blue scale, not {WHITE_BALANCE}"
+    )
+POWER_BUDGET_MILLIAMPS = optional_float_getenv("POWER_BUDGET_MILLIAMPS")
 
 SOUND_POOL = Path(checked_getenv("SOUND_POOL"))
 SOUND_DING = Path(checked_getenv("SOUND_DING"))
 SOUND_FINALE = Path(checked_getenv("SOUND_FINALE"))
+SOUND_CACHE = optional_getenv("SOUND_CACHE")
+SOFTWARE_MIXER = bool(optional_int_getenv("SOFTWARE_MIXER"))
+AUDIO_FREQUENCY = optional_int_getenv("AUDIO_FREQUENCY") or pygame_mixer.FREQUENCY
+AUDIO_BUFFER = pygame_mixer.buffer_size(
+    optional_getenv("AUDIO_LATENCY"), optional_int_getenv("AUDIO_BUFFER")
+)
 
 
 async def main():
-    with pygame_mixer.init():
-        colours = parse_colours(COLOURS)
-        esp_mapping = parse_gears(GEARS)
-        sounds = list(map(Sound, SOUND_POOL.iterdir()))
-        sounds = Sounds(
-            gears=list(esp_mapping.values()),
-            sounds=sounds,
-            ding=Sound(SOUND_DING),
-        )
-        machine = Machine(
-            esp_mapping=esp_mapping,
-            esp_events=listen_to_esps(),
-            wled=Wled(WLED_ADDRESS),
-            effect=LedEffectFixedCount(
+    cache = sound_cache(SOUND_CACHE and Path(SOUND_CACHE))
+    with pygame_mixer.init(frequency=AUDIO_FREQUENCY, buffer=AUDIO_BUFFER):
+        mixer = SoftwareMixer() if SOFTWARE_MIXER else None
+        with SoundLoader(sound_loader(cache, mixer)) as loader:
+            await run(loader, mixer)
+
+
+async def run(loader, mixer):
+    colours = parse_colours(COLOURS)
+    esp_mapping = parse_gears(GEARS)
+    frame_scheduler = FrameScheduler(UPDATE_FREQUENCY)
+    # the finale first, as the machine can't be charged without it
+    finale = loader.load_later(SOUND_FINALE)
+    sounds = Sounds(gears=list(esp_mapping.values()), sounds=[])
+    loader.load_later(SOUND_DING, sounds.set_ding)
+    for path in SOUND_POOL.iterdir():
+        loader.load_later(path, sounds.add_sound)
+    wled = make_wled(frame_scheduler)
+    machine = Machine(
+        esp_mapping=esp_mapping,
+        esp_events=listen_to_esps(),
+        wled=wled,
+        effect=LedEffectFixedCount(
+            limit_power(
                 GammaCorrection(
                     flowing_memento.effect(colours, LED_COUNT),
-                ),
-                LED_COUNT,
+                    brightness=BRIGHTNESS,
+                    white_balance=WHITE_BALANCE,
+                )
             ),
-            sounds=sounds,
-            finale=Sound(SOUND_FINALE),
-            finale_duration=FINALE_DURATION,
+            LED_COUNT,
+            clock=frame_scheduler,
+        ),
+        sounds=sounds,
+        finale=finale,
+        finale_duration=FINALE_DURATION,
+        render_in_thread=RENDER_IN_THREAD,
+    )
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            if mixer is not None:
+                tg.create_task(mixer.run())
+            tg.create_task(frame_scheduler.print_diagnostics_task(1))
+            tg.create_task(machine.run())
+    finally:
+        await wled.close()
+
+
+def sound_loader(cache, mixer):
+    if mixer is None:
+        return cache.load
+    return lambda path: mixer.voice(cache.load(path))
+
+
+def limit_power(effect):
+    if POWER_BUDGET_MILLIAMPS is None:
+        return effect
+    return PowerLimit(effect, POWER_BUDGET_MILLIAMPS)
+
+
+def make_wled(scheduler):
+    if WLED_SEGMENTS is not None:
+        return WledCluster(
+            parse_segments(WLED_SEGMENTS, LED_COUNT),
+            keyframe_interval=WLED_KEYFRAME_INTERVAL,
+            scheduler=scheduler,
         )
-
-        await machine.run()
+    return Wled(
+        WLED_ADDRESS,
+        mirror_addresses=WLED_MIRROR_ADDRESSES,
+        keyframe_interval=WLED_KEYFRAME_INTERVAL,
+        scheduler=scheduler,
+    )
 
 
 async def listen_to_esps():
     async with esp_diagnostics.start(time_between_prints=1) as diagnostics:
-        async for id, count in esp_listener.listen_to_esps():
-            diagnostics.seen(id)
+        async for batch in esp_listener.listen_to_esps_batched():
+            for id, datagrams in batch.datagrams.items():
+                diagnostics.seen(id, datagrams)
 
-            yield id, count
+            yield batch
 
 
 def parse_gears(gears):
     def parse_gear(gear):
         esp_id, sensitivity = gear.split(":")
-        return int(esp_id), Gear(int(sensitivity))
+        return int(esp_id), int(sensitivity)
+
+    esp_ids, sensitivities = zip(*map(parse_gear, gears.split(",")))
+    return dict(zip(esp_ids, GearBank(sensitivities), strict=True))
+
+
+def parse_segments(segments, led_count):
+    import json
 
-    return dict(map(parse_gear, gears.split(",")))
+    segments = [WledSegment(**segment) for segment in json.loads(segments)]
+    check_segments(segments, led_count)
+    return segments
 
 
 def parse_colours(colours):
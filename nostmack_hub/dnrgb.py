@@ -2,16 +2,24 @@ import struct
 from typing import Iterable
 import itertools
 
+import numpy as np
 
-def dnrgb_packets(rgb_values: list[tuple[int, int, int]]):
-    MAX_SIZE = 489
+MAX_LEDS_PER_PACKET = 489
+HEADER_SIZE = 4
 
-    for i in range(0, len(rgb_values), MAX_SIZE):
-        yield dnrgb_packet(rgb_values[i : i + MAX_SIZE], start_index=i)
 
+def dnrgb_packets(rgb_values: list[tuple[int, int, int]] | np.ndarray):
+    for i in range(0, len(rgb_values), MAX_LEDS_PER_PACKET):
+        yield dnrgb_packet(rgb_values[i : i + MAX_LEDS_PER_PACKET], start_index=i)
 
-def dnrgb_packet(rgb_values: Iterable[tuple[int, int, int]], *, start_index) -> bytes:
-    rgb_bytes = bytes(itertools.chain.from_iterable(rgb_values))
+
+def dnrgb_packet(
+    rgb_values: Iterable[tuple[int, int, int]] | np.ndarray, *, start_index
+) -> bytes:
+    if isinstance(rgb_values, np.ndarray):
+        rgb_bytes = rgb_values.astype(np.uint8, copy=False).tobytes()
+    else:
+        rgb_bytes = bytes(itertools.chain.from_iterable(rgb_values))
 
     return dnrgb_header(1, start_index) + rgb_bytes
 
@@ -24,3 +32,132 @@ def dnrgb_header(wait_time: int, start_index: int) -> bytes:
     if start_index > 2**16 - 1:
         raise ValueError("Start index must be a nonnegative 16-bit number")
     return struct.pack(">BBH", DNRGB_PROTOCOL_VALUE, wait_time, start_index)
+
+
+class DnrgbEncoder:
+    # `start_index` is where the frame's first LED sits on the controller
+    def __init__(self, led_count: int, *, wait_time: int = 1, start_index: int = 0):
+        self.led_count = led_count
+        self.wait_time = wait_time
+        self.start_index = start_index
+
+        self.packets: list[bytearray] = []
+        self.pixel_ranges: list[tuple[int, int]] = []
+        for start in range(0, led_count, MAX_LEDS_PER_PACKET):
+            end = min(start + MAX_LEDS_PER_PACKET, led_count)
+            packet = bytearray(HEADER_SIZE + (end - start) * 3)
+            packet[:HEADER_SIZE] = dnrgb_header(wait_time, start_index + start)
+            self.packets.append(packet)
+            self.pixel_ranges.append((start * 3, end * 3))
+
+        self.views = [memoryview(packet) for packet in self.packets]
+        self.run_packets: list[memoryview] = []
+
+    # the returned views are overwritten by the next call to encode
+    def encode(self, frame: np.ndarray) -> list[memoryview]:
+        pixels = self._pixels(frame)
+        for view, (start, end) in zip(self.views, self.pixel_ranges):
+            view[HEADER_SIZE:] = pixels[start:end]
+
+        return self.views
+
+    # encodes only the LEDs in `runs`, a list of (start, end) index ranges
+    def encode_runs(
+        self, frame: np.ndarray, runs: list[tuple[int, int]]
+    ) -> list[memoryview]:
+        pixels = self._pixels(frame)
+
+        while len(self.run_packets) < len(runs):
+            self.run_packets.append(
+                memoryview(bytearray(HEADER_SIZE + MAX_LEDS_PER_PACKET * 3))
+            )
+
+        packets = []
+        for packet, (start, end) in zip(self.run_packets, runs):
+            if end - start > MAX_LEDS_PER_PACKET:
+                raise ValueError("Run does not fit in a single packet")
+            length = HEADER_SIZE + (end - start) * 3
+            packet[:HEADER_SIZE] = dnrgb_header(
+                self.wait_time, self.start_index + start
+            )
+            packet[HEADER_SIZE:length] = pixels[start * 3 : end * 3]
+            packets.append(packet[:length])
+
+        return packets
+
+    def _pixels(self, frame: np.ndarray) -> memoryview:
+        if frame.shape != (self.led_count, 3) or frame.dtype != np.uint8:
+            raise ValueError(f"Expected a ({self.led_count}, 3) uint8 frame")
+        return frame.data.cast("B")
+
+
+# Sending an unchanged LED costs 3 bytes, a new packet costs its own header plus
+# ~28 bytes of UDP/IP overhead, so runs closer together than this are merged.
+MAX_RUN_GAP = 10
+
+
+def changed_runs(
+    previous: np.ndarray, current: np.ndarray, *, max_gap: int = MAX_RUN_GAP
+) -> list[tuple[int, int]]:
+    changed = np.flatnonzero(np.any(previous != current, axis=1))
+    if len(changed) == 0:
+        return []
+
+    breaks = np.flatnonzero(np.diff(changed) > max_gap + 1)
+    starts = changed[np.concatenate(([0], breaks + 1))]
+    ends = changed[np.concatenate((breaks, [len(changed) - 1]))] + 1
+
+    runs = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        for run_start in range(start, end, MAX_LEDS_PER_PACKET):
+            runs.append((run_start, min(run_start + MAX_LEDS_PER_PACKET, end)))
+    return runs
+
+
+class DnrgbDeltaEncoder:
+    def __init__(
+        self,
+        led_count: int,
+        *,
+        keyframe_interval: int,
+        max_gap: int = MAX_RUN_GAP,
+        wait_time: int = 1,
+        start_index: int = 0,
+    ):
+        if keyframe_interval < 1:
+            raise ValueError("Keyframe interval must be at least 1")
+        self.led_count = led_count
+        self.keyframe_interval = keyframe_interval
+        self.max_gap = max_gap
+        self.encoder = DnrgbEncoder(
+            led_count, wait_time=wait_time, start_index=start_index
+        )
+        self.previous = np.zeros((led_count, 3), dtype=np.uint8)
+        self.frames_until_keyframe = 0
+
+    def encode(self, frame: np.ndarray) -> list[memoryview]:
+        if self.frames_until_keyframe == 0:
+            packets = self.encoder.encode(frame)
+            self.frames_until_keyframe = self.keyframe_interval
+        else:
+            runs = changed_runs(self.previous, frame, max_gap=self.max_gap)
+            # WLED leaves realtime mode after `wait_time` seconds without a
+            # packet, so an unchanged frame still resends its first LED
+            runs = runs or [(0, 1)]
+            packets = self.encoder.encode_runs(frame, runs)
+
+        self.frames_until_keyframe -= 1
+        np.copyto(self.previous, frame)
+        return packets
+
+
+def dnrgb_encoder(
+    led_count: int, *, keyframe_interval: int | None, start_index: int = 0
+) -> DnrgbEncoder | DnrgbDeltaEncoder:
+    if keyframe_interval is None:
+        return DnrgbEncoder(led_count, start_index=start_index)
+    if keyframe_interval < 1:
+        raise ValueError("Keyframe interval must be at least 1")
+    return DnrgbDeltaEncoder(
+        led_count, keyframe_interval=keyframe_interval, start_index=start_index
+    )
@@ -18,8 +18,8 @@ class EspDiagnostics:
     def __init__(self):
         self._seen = {}
 
-    def seen(self, esp_id: int):
-        self._seen[esp_id] = self._seen.get(esp_id, 0) + 1
+    def seen(self, esp_id: int, times: int = 1):
+        self._seen[esp_id] = self._seen.get(esp_id, 0) + times
 
     async def print_diagnostics_task(self, wait):
         while True:
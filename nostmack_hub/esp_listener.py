@@ -1,16 +1,78 @@
+import asyncio
+from dataclasses import dataclass, field
+import socket
 import struct
 
 from nostmack_hub.udp import bind
 
+ESP_ADDRESS = ("0.0.0.0", 1234)
+ESP_MESSAGE = struct.Struct("!ih")
+MAX_BATCH_SIZE = 1024
 
-async def listen_to_esps():
-    async with bind(("0.0.0.0", 1234)) as socket:
+
+async def listen_to_esps(addr=ESP_ADDRESS, *, sock: socket.socket | None = None):
+    async with bind(addr, sock) as socket:
         while True:
             bytes, _ = await socket.recv()
 
             (
                 id,
                 count,
-            ) = struct.unpack("!ih", bytes)
+            ) = ESP_MESSAGE.unpack(bytes)
 
             yield (id, count)
+
+
+@dataclass
+class EspBatch:
+    # total turns and number of datagrams per esp id
+    counts: dict[int, int] = field(default_factory=dict)
+    datagrams: dict[int, int] = field(default_factory=dict)
+
+    def add(self, id: int, count: int):
+        self.counts[id] = self.counts.get(id, 0) + abs(count)
+        self.datagrams[id] = self.datagrams.get(id, 0) + 1
+
+
+def bind_esp_socket(addr=ESP_ADDRESS) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    sock.bind(addr)
+    return sock
+
+
+# Drains every datagram waiting on the socket and yields them as one batch, so a
+# burst of datagrams costs one wakeup instead of one per datagram. Listens on
+# `sock` if given, say one bound to port 0, and closes it when done.
+async def listen_to_esps_batched(
+    addr=ESP_ADDRESS, *, sock: socket.socket | None = None
+):
+    loop = asyncio.get_running_loop()
+    readable = asyncio.Event()
+
+    with sock or bind_esp_socket(addr) as sock:
+        buffer = bytearray(ESP_MESSAGE.size)
+
+        loop.add_reader(sock.fileno(), readable.set)
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+
+                batch = EspBatch()
+                for _ in range(MAX_BATCH_SIZE):
+                    try:
+                        size = sock.recv_into(buffer)
+                    except BlockingIOError:
+                        break
+                    if size != ESP_MESSAGE.size:
+                        continue
+                    batch.add(*ESP_MESSAGE.unpack(buffer))
+                else:
+                    # there may be more waiting, pick them up in the next batch
+                    readable.set()
+
+                if batch.counts:
+                    yield batch
+        finally:
+            loop.remove_reader(sock.fileno())
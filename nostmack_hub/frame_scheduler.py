@@ -0,0 +1,60 @@
+import asyncio
+
+
+class FrameScheduler:
+    def __init__(self, period: float):
+        self.period = period
+        self.late_frames = 0
+        self.dropped_frames = 0
+        self._reported = (0, 0)
+        self._deadline: float | None = None
+        self._last_tick_deadline: float | None = None
+
+    def restart(self):
+        self._deadline = None
+        self._last_tick_deadline = None
+
+    async def next_frame(self):
+        now = asyncio.get_running_loop().time()
+
+        if self._deadline is None:
+            self._deadline = now
+            return
+
+        self._deadline += self.period
+        if now <= self._deadline:
+            await asyncio.sleep(self._deadline - now)
+            return
+
+        # start the late frame now, but never try to catch up on missed ones
+        self.late_frames += 1
+        missed = int((now - self._deadline) / self.period)
+        self.dropped_frames += missed
+        self._deadline += missed * self.period
+
+    # milliseconds of animation time between this frame and the last ticked one,
+    # so that it can stand in for pygame's Clock
+    def tick(self) -> int:
+        if self._deadline is None:
+            return 0
+
+        last_deadline = self._last_tick_deadline
+        self._last_tick_deadline = self._deadline
+        if last_deadline is None:
+            return 0
+        return round(self._deadline * 1000) - round(last_deadline * 1000)
+
+    # late and dropped frames since the last report, or None if there were none
+    def report(self) -> str | None:
+        late = self.late_frames - self._reported[0]
+        dropped = self.dropped_frames - self._reported[1]
+        self._reported = (self.late_frames, self.dropped_frames)
+        if late == 0:
+            return None
+        return f"Frames: {late} late, {dropped} dropped"
+
+    async def print_diagnostics_task(self, wait):
+        while True:
+            await asyncio.sleep(wait)
+            if (report := self.report()) is not None:
+                print(report)
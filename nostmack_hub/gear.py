@@ -1,27 +1,187 @@
 import asyncio
+from typing import Callable, Iterator, Sequence
 
-from nostmack_hub.saturating_number import SaturatingNumber
+import numpy as np
 
+from nostmack_hub.pulse import Pulse, PulseWatch
 
-class Gear:
-    def __init__(self, sensitivity) -> None:
-        self.value = SaturatingNumber(0, min=0, max=255)
-        self.sensitivity = sensitivity
-        self._touched_event = asyncio.Event()
-        self._charged_event = asyncio.Event()
+MIN_VALUE = 0
+MAX_VALUE = 255
 
-    def reset(self):
-        self.value.inner = 0
+# a gear starts discharging once it hasn't been touched for a while...
+IDLE_TIMEOUT = 1
+# ...or for longer if it is fully charged
+CHARGED_IDLE_TIMEOUT = 90
+# and then loses `sensitivity` every DISCHARGE_INTERVAL seconds
+DISCHARGE_INTERVAL = 0.1
 
-    def turned(self, amount: int):
-        if amount == 0:
+
+class GearBank:
+    # The state of many gears, one array element per gear. Values are not
+    # ticked down by a task, they are computed from the value and time of the
+    # last touch whenever they are read. `values` holds the values as of the
+    # last read, so listeners can be told when a gear crosses a threshold.
+    # `gears` are the views onto the bank, made here unless given
+    def __init__(self, sensitivities: Sequence[int], gears: list["Gear"] | None = None):
+        if any(sensitivity <= 0 for sensitivity in sensitivities):
+            raise ValueError(f"Sensitivities must be positive, not {sensitivities}")
+        self.sensitivities = np.array(sensitivities, dtype=np.int64)
+        self.touched_at = np.zeros(len(sensitivities), dtype=np.float64)
+        self.touched_values = np.zeros(len(sensitivities), dtype=np.int64)
+        self.values = np.zeros(len(sensitivities), dtype=np.int64)
+
+        if gears is None:
+            gears = [
+                Gear(sensitivity, bank=self, index=index)
+                for index, sensitivity in enumerate(sensitivities)
+            ]
+        self.gears = gears
+
+    def __len__(self) -> int:
+        return len(self.gears)
+
+    def __iter__(self) -> Iterator["Gear"]:
+        return iter(self.gears)
+
+    def __getitem__(self, index: int) -> "Gear":
+        return self.gears[index]
+
+    # `indices` must not repeat, sum the turns of a gear before calling this
+    def turned(self, indices: Sequence[int], amounts: Sequence[int]):
+        indices = np.asarray(indices, dtype=np.intp)
+        amounts = np.abs(np.asarray(amounts, dtype=np.int64))
+        indices, amounts = indices[amounts != 0], amounts[amounts != 0]
+        if len(indices) == 0:
             return
 
-        self.value.add(abs(amount) * self.sensitivity)
-        self._touched()
+        now = asyncio.get_running_loop().time()
+        values = np.minimum(
+            self.values_at(now, indices) + amounts * self.sensitivities[indices],
+            MAX_VALUE,
+        )
+        self.touched_at[indices] = now
+        self.touched_values[indices] = values
+        self.values[indices] = values
+
+        for index, value in zip(indices.tolist(), values.tolist()):
+            gear = self.gears[index]
+            gear.touched.fire()
+            gear._notify()
+            if value == MAX_VALUE:
+                gear.charged.fire()
+
+    def reset(self, index: int):
+        self.touched_at[index] = 0
+        self.touched_values[index] = MIN_VALUE
+        self._publish(index, MIN_VALUE)
+
+    def values_at(self, time: float, index=slice(None)) -> np.ndarray:
+        touched_values = self.touched_values[index]
+        steps = np.floor(
+            (time - self.discharge_starts(index)) / DISCHARGE_INTERVAL + 1e-9
+        )
+        # the first step is taken as soon as discharging starts
+        steps = np.maximum(steps + 1, 0)
+        values = touched_values - steps * self.sensitivities[index]
+        return np.maximum(values, MIN_VALUE).astype(np.int64)
+
+    def discharge_starts(self, index=slice(None)) -> np.ndarray:
+        idle_timeouts = np.where(
+            self.touched_values[index] == MAX_VALUE, CHARGED_IDLE_TIMEOUT, IDLE_TIMEOUT
+        )
+        return self.touched_at[index] + idle_timeouts
+
+    # the next time a gear reaches or leaves a threshold, unless touched again
+    def next_deadline(self, time: float) -> float | None:
+        starts = self.discharge_starts()
+        steps = -(-self.touched_values // self.sensitivities)
+        discharged = starts + (steps - 1) * DISCHARGE_INTERVAL
+
+        charged = self.touched_values == MAX_VALUE
+        deadlines = np.where(charged & (time < starts), starts, discharged)
+        deadlines = deadlines[(self.touched_values != MIN_VALUE) & (time < deadlines)]
+        return float(deadlines.min()) if len(deadlines) else None
+
+    # the next time any gear's value changes, unless touched again
+    def next_change(self, time: float) -> float | None:
+        starts = self.discharge_starts()
+        # the steps taken so far, the first one is taken at `starts`
+        steps = np.floor((time - starts) / DISCHARGE_INTERVAL + 1e-9) + 1
+        changes = starts + np.maximum(steps, 0) * DISCHARGE_INTERVAL
+        changes = changes[self.values_at(time) != MIN_VALUE]
+        return float(changes.min()) if len(changes) else None
+
+    def value(self, index: int) -> int:
+        value = int(self.values_at(asyncio.get_running_loop().time(), index))
+        self._publish(index, value)
+        return value
+
+    def settle(self) -> np.ndarray:
+        values = self.values_at(asyncio.get_running_loop().time())
+        crossed = np.flatnonzero(crossed_threshold(self.values, values))
+        self.values[:] = values
+        for index in crossed.tolist():
+            self.gears[index]._notify()
+        return self.values
+
+    def _publish(self, index: int, value: int):
+        crossed = crossed_threshold(self.values[index], value)
+        self.values[index] = value
+        if crossed:
+            self.gears[index]._notify()
+
+
+def crossed_threshold(old, new):
+    return ((old == MIN_VALUE) != (new == MIN_VALUE)) | (
+        (old == MAX_VALUE) != (new == MAX_VALUE)
+    )
+
+
+class GearValue:
+    min = MIN_VALUE
+    max = MAX_VALUE
+
+    def __init__(self, gear: "Gear"):
+        self.gear = gear
 
-        if self.is_charged():
-            self._charged()
+    @property
+    def inner(self) -> int:
+        return self.gear.bank.value(self.gear.index)
+
+    @property
+    def is_max(self):
+        return self.inner == self.max
+
+    @property
+    def is_min(self):
+        return self.inner == self.min
+
+
+class Gear:
+    # A view onto one gear of a `GearBank`. A gear created on its own gets a
+    # bank of its own.
+    def __init__(
+        self, sensitivity, *, bank: GearBank | None = None, index: int = 0
+    ) -> None:
+        if bank is None:
+            bank = GearBank([sensitivity], gears=[self])
+        self.bank = bank
+        self.index = index
+
+        self.value = GearValue(self)
+        self._listeners: list[Callable[[], None]] = []
+        self.touched = Pulse()
+        self.charged = Pulse()
+
+    @property
+    def sensitivity(self) -> int:
+        return int(self.bank.sensitivities[self.index])
+
+    def reset(self):
+        self.bank.reset(self.index)
+
+    def turned(self, amount: int):
+        self.bank.turned([self.index], [amount])
 
     def is_discharged(self):
         return self.value.is_min
@@ -29,39 +189,86 @@ class Gear:
     def is_charged(self):
         return self.value.is_max
 
-    def _touched(self):
-        self._touched_event.set()
-        self._touched_event = asyncio.Event()
+    def touched_event(self) -> PulseWatch:
+        return self.touched.watch()
+
+    def charged_event(self) -> PulseWatch:
+        return self.charged.watch()
 
-    def touched_event(self):
-        return self._touched_event
+    # `listener` is called whenever the gear is touched, or becomes or stops
+    # being charged or discharged
+    def subscribe(self, listener: Callable[[], None]):
+        self._listeners.append(listener)
 
-    def _charged(self):
-        self._charged_event.set()
-        self._charged_event = asyncio.Event()
+    def unsubscribe(self, listener: Callable[[], None]):
+        self._listeners.remove(listener)
 
-    def charged_event(self):
-        return self._charged_event
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
 
-    async def _wait_start_discharging(self):
+    async def discharge_task(self):
+        await discharge_gears([self])
+
+
+def gear_values(gears: Sequence[Gear]) -> Sequence[int]:
+    if isinstance(gears, GearBank):
+        return gears.settle()
+    return [gear.value.inner for gear in gears]
+
+
+# A bank if the gears are exactly the gears of one bank, in order, so that
+# their values can be read and updated together.
+def gear_sequence(gears: list[Gear]) -> Sequence[Gear]:
+    if gears and all(gear.bank is gears[0].bank for gear in gears):
+        bank = gears[0].bank
+        if [gear.index for gear in gears] == list(range(len(bank))):
+            return bank
+    return gears
+
+
+def next_value_change(gears: Sequence[Gear], time: float) -> float | None:
+    banks = dict.fromkeys(gear.bank for gear in gears)
+    changes = [bank.next_change(time) for bank in banks]
+    return min((change for change in changes if change is not None), default=None)
+
+
+async def discharge_gears(gears: Sequence[Gear]):
+    loop = asyncio.get_running_loop()
+    banks = list(dict.fromkeys(gear.bank for gear in gears))
+    touched = asyncio.Event()
+    for gear in gears:
+        gear.subscribe(touched.set)
+    try:
         while True:
-            if self.is_discharged():
-                await self.touched_event().wait()
+            touched.clear()
+            now = loop.time()
+            deadlines = []
+            for bank in banks:
+                bank.settle()
+                if (deadline := bank.next_deadline(now)) is not None:
+                    deadlines.append(deadline)
 
-            timeout = 90 if self.is_charged() else 1
             try:
-                async with asyncio.timeout(timeout):
-                    await self.touched_event().wait()
-            except asyncio.TimeoutError:
-                return
+                async with asyncio.timeout_at(min(deadlines, default=None)):
+                    await touched.wait()
+            except TimeoutError:
+                pass
+    finally:
+        for gear in gears:
+            gear.unsubscribe(touched.set)
 
-    async def _discharge(self):
-        was_touched = self.touched_event()
-        while not (self.is_discharged() or was_touched.is_set()):
-            self.value.sub(self.sensitivity)
-            await asyncio.sleep(0.1)
 
-    async def discharge_task(self):
+async def wait_all(gears: Sequence[Gear], predicate: Callable[[Gear], bool]):
+    changed = asyncio.Event()
+    for gear in gears:
+        gear.subscribe(changed.set)
+    try:
         while True:
-            await self._wait_start_discharging()
-            await self._discharge()
+            changed.clear()
+            if all(predicate(gear) for gear in gears):
+                return
+            await changed.wait()
+    finally:
+        for gear in gears:
+            gear.unsubscribe(changed.set)
@@ -1,17 +1,31 @@
-import itertools
+import functools
 import math
 from typing import Callable, Protocol
-import random
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+import numpy as np
 
 from nostmack_hub.gamma_correction import GAMMA_CORRECTION
-from nostmack_hub.led_effect.animation import AnimatedValue, Animations, Dissapate, Ramp
+from nostmack_hub.led_effect.animation import (
+    AnimatedValues,
+    Animations,
+    Dissapate,
+    Ramp,
+)
 from nostmack_hub.led_effect.colour import (
     Colour,
+    Frame,
     add_colours,
-    scale_colour,
+    add_frames,
+    colours_to_frame,
+    frame_blending_fn,
+    frame_to_colours,
     subtract_colours,
 )
+from nostmack_hub.led_effect.frame_pool import FrameCache, FramePool
+
+# rendered frames kept per effect whose output only depends on gear values
+FRAME_CACHE_SIZE = 32
 
 
 class LedEffect(Protocol):
@@ -21,49 +35,98 @@ class LedEffect(Protocol):
         raise NotImplementedError
 
 
-class StripedEffect(LedEffect):
+class ArrayLedEffect(LedEffect):
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        raise NotImplementedError
+
+    def calculate_array(
+        self, gear_values: list[int], led_count: int, delta_time: int
+    ) -> Frame:
+        frames = FramePool(led_count)
+        out = frames.acquire()
+        self.calculate_into(gear_values, delta_time, out, frames)
+        return out
+
+    def calculate(
+        self, gear_values: list[int], led_count: int, delta_time: int
+    ) -> list[Colour]:
+        return frame_to_colours(
+            self.calculate_array(gear_values, led_count, delta_time)
+        )
+
+
+def calculate_frame_into(
+    effect: LedEffect,
+    gear_values: list[int],
+    delta_time: int,
+    out: Frame,
+    frames: FramePool,
+):
+    if isinstance(effect, ArrayLedEffect):
+        effect.calculate_into(gear_values, delta_time, out, frames)
+    else:
+        out[:] = colours_to_frame(effect.calculate(gear_values, len(out), delta_time))
+
+
+class ColourTableEffect(ArrayLedEffect):
+    # Every LED shows one of `colours`, scaled by its gear's value. The frame
+    # only depends on the gear values, so recently rendered frames are kept.
     def __init__(self, colours: list[Colour]):
         self.colours = colours
+        self.colour_table = np.array(colours, dtype=np.float32)
+        self.cache = FrameCache(FRAME_CACHE_SIZE)
 
-    def calculate(self, gear_values: list[int], led_count: int, delta_time: int):
+    def indices(self, led_count: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
         assert len(gear_values) == len(
             self.colours
         ), "Received wrong number of gear values"
 
-        gear_values = scale_gear_values(gear_values)
+        key = (len(out), *gear_values)
+        if (frame := self.cache.get(key)) is None:
+            frame = self.cache.acquire(out.shape)
+            table = scale_colours(self.colour_table, scale_gear_values(gear_values))
+            # mode="clip" lets numpy write into `frame` without an intermediate buffer
+            np.take(table, self.indices(len(out)), axis=0, out=frame, mode="clip")
+            self.cache.put(key, frame)
 
-        lights = [(0, 0, 0)] * led_count
+        np.copyto(out, frame)
 
-        values_colours = itertools.cycle(zip(gear_values, self.colours, strict=True))
 
-        for i in range(led_count):
-            value, colour = next(values_colours)
-            lights[i] = scale_colour(colour, value / 255)
-
-        return lights
+class StripedEffect(ColourTableEffect):
+    def indices(self, led_count: int) -> np.ndarray:
+        return stripe_indices(led_count, len(self.colours))
 
 
 @dataclass
-class StaticStripeEffect(LedEffect):
+class StaticStripeEffect(ArrayLedEffect):
     inner: LedEffect
     colour: Colour
     stripe_width: int
     stripe_spacing: int
     offset: int = 0
 
-    def calculate(
-        self, gear_values: list[int], led_count: int, delta_time: int
-    ) -> list[Colour]:
-        lights = self.inner.calculate(gear_values, led_count, delta_time)
-        for i in range(
-            self.offset, len(lights), self.stripe_width + self.stripe_spacing
-        ):
-            for j in range(self.stripe_width):
-                try:
-                    lights[i + j] = self.colour
-                except IndexError:
-                    break
-        return lights
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        calculate_frame_into(self.inner, gear_values, delta_time, out, frames)
+        np.copyto(out, self.colour, where=self.stripe_mask(len(out)))
+
+    def stripe_mask(self, led_count: int) -> np.ndarray:
+        return static_stripe_mask(
+            led_count, self.stripe_width, self.stripe_spacing, self.offset
+        )
+
+    def gap_mask(self, led_count: int) -> np.ndarray:
+        return static_gap_mask(
+            led_count, self.stripe_width, self.stripe_spacing, self.offset
+        )
 
 
 def alternating_stripe_effect(
@@ -88,41 +151,28 @@ def alternating_stripe_effect(
     )
 
 
-class SectoredEffect(LedEffect):
-
-    def __init__(self, colours: list[Colour]):
-        self.colours = colours
-
-    def calculate(self, gear_values: list[int], led_count: int, delta_time: int):
-        assert len(gear_values) == len(
-            self.colours
-        ), "Received wrong number of gear values"
-
-        gear_values = scale_gear_values(gear_values)
-
-        lights = [(0, 0, 0)] * led_count
-
-        sector_length = math.ceil(led_count / len(self.colours))
+class SectoredEffect(ColourTableEffect):
+    def indices(self, led_count: int) -> np.ndarray:
+        return sector_indices(led_count, len(self.colours))
 
-        for sector, (value, colour) in enumerate(
-            zip(gear_values, self.colours, strict=True)
-        ):
-            start = sector * sector_length
-            end = (sector + 1) * sector_length
-            for i in range(start, end):
-                lights[i] = scale_colour(colour, value / 255)
 
-        return lights
-
-
-class ShimmerEffect(LedEffect):
+class ShimmerEffect(ArrayLedEffect):
     def __init__(self, colour: Colour):
         self.colour = colour
+        self.rng = np.random.default_rng()
+        self.intensities = np.zeros(0, dtype=np.float32)
 
-    def calculate(
-        self, gear_values: list[int], led_count: int, delta_time: int
-    ) -> list[Colour]:
-        return [scale_colour(self.colour, random.random()) for _ in range(led_count)]
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        if len(self.intensities) != len(out):
+            self.intensities = np.zeros(len(out), dtype=np.float32)
+
+        self.rng.random(dtype=np.float32, out=self.intensities)
+        # one channel at a time, broadcasting across channels makes numpy buffer
+        for channel, value in enumerate(self.colour):
+            np.multiply(self.intensities, value, out=out[:, channel])
+        np.rint(out, out=out)
 
 
 def shimmer(effect, intensity: float):
@@ -133,65 +183,153 @@ def shimmer(effect, intensity: float):
     )
 
 
-class PulseOnFullChargeEffect(LedEffect):
+class PulseOnFullChargeEffect(ArrayLedEffect):
 
     def __init__(self, colours: list[Colour]):
         self.colours = colours
+        self.colour_table = np.array(colours, dtype=np.float64)
 
-        self.pulses: list[None | AnimatedValue] = [None] * len(self.colours)
+        # one pulse per gear, running while the gear is fully charged
+        self.pulses = AnimatedValues(
+            Animations([Ramp(400), Dissapate(1000)]), len(self.colours)
+        )
 
-    def calculate(self, gear_values: list[int], led_count: int, delta_time: int):
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
         assert len(gear_values) == len(
             self.colours
         ), "Received wrong number of gear values"
 
-        gear_values = scale_gear_values(gear_values)
+        charged = np.array(scale_gear_values(gear_values)) == 255
+
+        self.pulses.tick(delta_time)
+        self.pulses.stop(~charged)
+        self.pulses.start(charged & ~self.pulses.running)
 
-        for pulse in self.pulses:
-            if pulse is not None:
-                pulse.tick(delta_time)
+        lights = np.rint(self.colour_table * self.pulses.values()[:, np.newaxis])
+        out[:] = np.minimum(lights.sum(axis=0), 255)
 
-        lights = [(0, 0, 0)] * led_count
 
-        for gear, (gear_value, colour) in enumerate(
-            zip(gear_values, self.colours, strict=True)
-        ):
+@dataclass
+class LayeredEffect(ArrayLedEffect):
+    effects: list[LedEffect]
+    blending_fn: Callable[[Colour, Colour], Colour] = add_colours
+    plan: "LayerPlan | None" = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-            if gear_value == 255:
-                if self.pulses[gear] is None:
-                    self.pulses[gear] = AnimatedValue(
-                        Animations([Ramp(400), Dissapate(1000)])
-                    )
-            else:
-                self.pulses[gear] = None
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        # nested layers are flattened into this layer's plan, so only the
+        # outermost layer ever runs
+        if self.plan is None:
+            self.plan = LayerPlan.compile(self)
+        self.plan.run(gear_values, delta_time, out, frames)
 
-            if (pulse := self.pulses[gear]) is not None:
-                pulse_colour = scale_colour(colour, pulse.value())
-                for i in range(len(lights)):
-                    lights[i] = add_colours(lights[i], pulse_colour)
 
-        return lights
+# A layer tree compiled into a flat list of in-place steps. Each step works on
+# numbered frames: 0 is the output, deeper layers of the tree render into
+# higher numbered scratch frames which are then blended into their parent's.
 
 
 @dataclass
-class LayeredEffect(LedEffect):
-    effects: list[LedEffect]
-    blending_fn: Callable[[Colour, Colour], Colour] = add_colours
+class RenderStep:
+    effect: LedEffect
+    frame: int
 
-    def calculate(
-        self, gear_values: list[int], led_count: int, delta_time: int
-    ) -> list[Colour]:
-        effects = iter(self.effects)
-        lights = next(effects).calculate(gear_values, led_count, delta_time)
+    def run(self, gear_values, delta_time, frames: list[Frame], pool: FramePool):
+        calculate_frame_into(
+            self.effect, gear_values, delta_time, frames[self.frame], pool
+        )
 
-        for effect in effects:
-            colours = effect.calculate(gear_values, led_count, delta_time)
-            lights = [
-                self.blending_fn(light, colour)
-                for light, colour in zip(lights, colours, strict=True)
-            ]
 
-        return lights
+@dataclass
+class StripeStep:
+    effect: StaticStripeEffect
+    frame: int
+
+    def run(self, gear_values, delta_time, frames: list[Frame], pool: FramePool):
+        out = frames[self.frame]
+        np.copyto(out, self.effect.colour, where=self.effect.stripe_mask(len(out)))
+
+
+@dataclass
+class BlendStep:
+    blend: Callable[[Frame, Frame], None]
+    frame: int
+    source: int
+
+    def run(self, gear_values, delta_time, frames: list[Frame], pool: FramePool):
+        self.blend(frames[self.frame], frames[self.source])
+
+
+@dataclass
+class AddOutsideStripesStep:
+    # adding a frame with black stripes painted over it, without painting them
+    effect: StaticStripeEffect
+    frame: int
+    source: int
+
+    def run(self, gear_values, delta_time, frames: list[Frame], pool: FramePool):
+        out = frames[self.frame]
+        gaps = self.effect.gap_mask(len(out))
+        np.add(out, frames[self.source], out=out, where=gaps)
+        np.minimum(out, 255, out=out)
+
+
+LayerStep = RenderStep | StripeStep | BlendStep | AddOutsideStripesStep
+
+
+@dataclass
+class LayerPlan:
+    steps: list[LayerStep]
+    frame_count: int
+
+    @classmethod
+    def compile(cls, effect: LedEffect) -> "LayerPlan":
+        steps = []
+        frame_count = compile_layer(effect, 0, steps)
+        return cls(steps, frame_count)
+
+    def run(self, gear_values, delta_time, out: Frame, pool: FramePool):
+        frames = [out]
+        for _ in range(self.frame_count - 1):
+            frames.append(pool.acquire())
+        try:
+            for step in self.steps:
+                step.run(gear_values, delta_time, frames, pool)
+        finally:
+            for frame in frames[1:]:
+                pool.release(frame)
+
+
+# appends the steps rendering `effect` into `frame`, returns the number of
+# frames they use
+def compile_layer(effect: LedEffect, frame: int, steps: list[LayerStep]) -> int:
+    match effect:
+        case LayeredEffect(effects=[first, *rest], blending_fn=blending_fn):
+            frame_count = compile_layer(first, frame, steps)
+            blend = frame_blending_fn(blending_fn)
+            for layer in rest:
+                frame_count = max(frame_count, compile_layer(layer, frame + 1, steps))
+                if (
+                    blend is add_frames
+                    and isinstance(stripes := steps[-1], StripeStep)
+                    and not any(stripes.effect.colour)
+                ):
+                    steps[-1] = AddOutsideStripesStep(stripes.effect, frame, frame + 1)
+                else:
+                    steps.append(BlendStep(blend, frame, frame + 1))
+            return frame_count
+        case StaticStripeEffect(inner=inner):
+            frame_count = compile_layer(inner, frame, steps)
+            steps.append(StripeStep(effect, frame))
+            return frame_count
+        case _:
+            steps.append(RenderStep(effect, frame))
+            return frame + 1
 
 
 def scale_gear_values(gear_values):
@@ -203,3 +341,37 @@ def scale_gear_values(gear_values):
         return round(value / 254 * 150) + 50
 
     return list(map(value_mapper, gear_values))
+
+
+def scale_colours(colours: list[Colour] | np.ndarray, values: list[int]) -> Frame:
+    colours = np.asarray(colours, dtype=np.float32)
+    values = np.array(values, dtype=np.float32)
+    return np.round(colours * (values[:, np.newaxis] / 255))
+
+
+@functools.cache
+def stripe_indices(led_count: int, stripe_count: int) -> np.ndarray:
+    return np.arange(led_count) % stripe_count
+
+
+@functools.cache
+def sector_indices(led_count: int, sector_count: int) -> np.ndarray:
+    sector_length = math.ceil(led_count / sector_count)
+    return np.arange(led_count) // sector_length
+
+
+@functools.cache
+def static_stripe_mask(
+    led_count: int, stripe_width: int, stripe_spacing: int, offset: int
+) -> np.ndarray:
+    indices = np.arange(led_count) - offset
+    period = stripe_width + stripe_spacing
+    mask = (indices >= 0) & (indices % period < stripe_width)
+    return mask[:, np.newaxis]
+
+
+@functools.cache
+def static_gap_mask(
+    led_count: int, stripe_width: int, stripe_spacing: int, offset: int
+) -> np.ndarray:
+    return ~static_stripe_mask(led_count, stripe_width, stripe_spacing, offset)
@@ -1,6 +1,12 @@
 from dataclasses import dataclass
+from functools import cached_property
 from typing import Protocol
 
+import numpy as np
+
+# how finely animations without a piecewise-linear form are sampled, in ms
+CURVE_SAMPLE_INTERVAL = 10
+
 
 class Animation(Protocol):
     @property
@@ -10,6 +16,12 @@ class Animation(Protocol):
     def value(self, progress: int) -> float:
         raise NotImplementedError
 
+    # (progress, value) points that the animation linearly interpolates between
+    def breakpoints(self) -> tuple[list[float], list[float]]:
+        sample_count = max(self.total_time // CURVE_SAMPLE_INTERVAL, 1) + 1
+        times = np.linspace(0, self.total_time, sample_count).tolist()
+        return times, [self.value(time) for time in times]
+
 
 class AnimatedValue:
     def __init__(self, animation: Animation, progress: int = 0):
@@ -41,6 +53,9 @@ class Ramp(Animation):
             return 0
         return progress / self.time
 
+    def breakpoints(self):
+        return [0, self.time], [0, 1]
+
 
 @dataclass
 class Hold(Animation):
@@ -55,6 +70,9 @@ class Hold(Animation):
             return 0
         return 1
 
+    def breakpoints(self):
+        return [0, self.time], [1, 1]
+
 
 @dataclass
 class Dissapate(Animation):
@@ -70,12 +88,15 @@ class Dissapate(Animation):
 
         return max(self.time - progress, 0) / self.time
 
+    def breakpoints(self):
+        return [0, self.time], [1, 0]
+
 
 @dataclass
 class Animations(Animation):
     animations: list[Animation]
 
-    @property
+    @cached_property
     def total_time(self):
         return sum(a.total_time for a in self.animations)
 
@@ -86,3 +107,64 @@ class Animations(Animation):
 
             progress -= animation.total_time
         return 0
+
+    def breakpoints(self):
+        times, values = [], []
+        start = 0
+        for animation in self.animations:
+            animation_times, animation_values = animation.breakpoints()
+            animation_times = [start + time for time in animation_times]
+            # the previous animation owns the moment they meet
+            if times and animation_times[0] <= times[-1]:
+                animation_times[0] = np.nextafter(times[-1], np.inf)
+            times += animation_times
+            values += animation_values
+            start += animation.total_time
+        return times, values
+
+
+@dataclass
+class Curve:
+    # an animation as arrays of (progress, value) points
+    times: np.ndarray
+    values: np.ndarray
+
+    @classmethod
+    def compile(cls, animation: Animation) -> "Curve":
+        times, values = animation.breakpoints()
+        return cls(
+            np.array(times, dtype=np.float64), np.array(values, dtype=np.float64)
+        )
+
+    @property
+    def total_time(self) -> float:
+        return self.times[-1]
+
+    def value(self, progress: np.ndarray) -> np.ndarray:
+        return np.interp(progress, self.times, self.values, right=0)
+
+
+class AnimatedValues:
+    # `count` values that each run `animation` from their own start, advanced
+    # and evaluated together
+    def __init__(self, animation: Animation, count: int):
+        self.curve = Curve.compile(animation)
+        self.progress = np.zeros(count, dtype=np.float64)
+        self.running = np.zeros(count, dtype=np.bool_)
+
+    @property
+    def finished_animating(self) -> np.ndarray:
+        return self.progress > self.curve.total_time
+
+    def start(self, which: np.ndarray):
+        self.progress[which] = 0
+        self.running |= which
+
+    def stop(self, which: np.ndarray):
+        self.running &= ~which
+
+    def tick(self, delta):
+        self.progress[self.running & ~self.finished_animating] += delta
+
+    def values(self) -> np.ndarray:
+        return np.where(self.running, self.curve.value(self.progress), 0)
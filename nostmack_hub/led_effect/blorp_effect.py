@@ -1,11 +1,12 @@
 from dataclasses import dataclass
+import math
 import random
 
 import numpy as np
 
-from nostmack_hub.led_effect import LedEffect, scale_gear_values
-from nostmack_hub.led_effect.animation import AnimatedValue, Animations, Dissapate, Ramp
-from nostmack_hub.led_effect.colour import Colour, add_colours, scale_colour
+from nostmack_hub.led_effect import ArrayLedEffect, scale_gear_values
+from nostmack_hub.led_effect.colour import Colour, Frame
+from nostmack_hub.led_effect.frame_pool import FramePool
 
 
 @dataclass
@@ -18,20 +19,50 @@ class SeedConfig:
 SEED_FREQUENCY = 50
 
 
-class BlorpEffect(LedEffect):
+class BlorpEffect(ArrayLedEffect):
+    # Seeds are kept in slots of parallel arrays, `live` marks the slots in use.
+    # A seed ramps up for `ramp_time`, then dissapates over its own dissapate
+    # time, and lights the LEDs after `position` with the influence kernel
+    # scaled by its intensity.
 
     def __init__(self, colours: list[Colour], led_count: int, seed_config: SeedConfig):
-        self.colours = np.array(colours)
+        self.colours = np.array(colours, dtype=np.float32)
         self.led_count = led_count
         self.seed_config = seed_config
 
-        self.seeds: list[Seed] = []
         total_time = seed_config.ramp_time + seed_config.dissapate_time
         self.max_seeds = total_time / SEED_FREQUENCY
         self.time_since_last_seed_planted: int = 0
+        self.time: int = 0
+
+        capacity = math.ceil(self.max_seeds)
+        self.live = np.zeros(capacity, dtype=np.bool_)
+        self.positions = np.zeros(capacity, dtype=np.intp)
+        self.gears = np.zeros(capacity, dtype=np.intp)
+        self.planted_at = np.zeros(capacity, dtype=np.int64)
+        self.dissapate_times = np.ones(capacity, dtype=np.float32)
+
+        self.kernel = influence_kernel(seed_config.influence_size)
+        self.kernel_offsets = np.arange(seed_config.influence_size, dtype=np.intp)
+
+        # the LEDs lit by each seed, as indices into the flattened `gear_light`
+        self.splat_indices = np.zeros(
+            (capacity, seed_config.influence_size), dtype=np.intp
+        )
+        # and how much they are lit this frame
+        self.splat_weights = np.zeros(
+            (capacity, seed_config.influence_size), dtype=np.float32
+        )
+        # how much each LED is lit by the seeds of each gear
+        self.gear_light = np.zeros((led_count, len(colours)), dtype=np.float32)
+        self.gear_colours = np.zeros((len(colours), 3), dtype=np.float32)
+
+    @property
+    def seed_count(self) -> int:
+        return int(np.count_nonzero(self.live))
 
     def plant_new_seed(self):
-        if len(self.seeds) >= self.max_seeds:
+        if self.seed_count >= self.max_seeds:
             return
 
         gear = random.randrange(len(self.colours))
@@ -43,81 +74,80 @@ class BlorpEffect(LedEffect):
 
         dissapate_time = self.seed_config.dissapate_time + int(random.gauss(sigma=1000))
 
-        self.seeds.append(
-            Seed(
-                position,
-                gear,
-                influence_size=self.seed_config.influence_size,
-                animated_intensity=AnimatedValue(
-                    Animations(
-                        [Ramp(self.seed_config.ramp_time), Dissapate(dissapate_time)]
-                    )
-                ),
-            )
+        seed = int(np.argmin(self.live))
+        self.live[seed] = True
+        self.positions[seed] = position
+        self.gears[seed] = gear
+        self.planted_at[seed] = self.time
+        self.dissapate_times[seed] = dissapate_time
+
+        indices = self.splat_indices[seed]
+        np.add(self.kernel_offsets, position, out=indices)
+        np.remainder(indices, self.led_count, out=indices)
+        np.multiply(indices, len(self.colours), out=indices)
+        np.add(indices, gear, out=indices)
+
+    def remove_done_seeds(self):
+        total_times = self.seed_config.ramp_time + self.dissapate_times
+        self.live &= self.time - self.planted_at <= total_times
+
+    def intensities(self) -> np.ndarray:
+        progress = (self.time - self.planted_at).astype(np.float32)
+        ramp_time = self.seed_config.ramp_time
+        ramp = progress / ramp_time
+        # a dissapate time jittered to zero or below has no dissapation at all
+        dissapate = (self.dissapate_times + ramp_time - progress) / np.maximum(
+            self.dissapate_times, 1
+        )
+        intensities = np.where(
+            progress <= ramp_time,
+            ramp,
+            np.where(progress - ramp_time <= self.dissapate_times, dissapate, 0),
         )
+        # and a seed done before it started is never lit
+        intensities[~self.live | (ramp_time + self.dissapate_times < 0)] = 0
+        return intensities
 
-    def calculate(self, gear_values: list[int], led_count: int, delta_time: int):
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
         assert len(gear_values) == len(
             self.colours
         ), "Received wrong number of gear values"
-        assert self.led_count == led_count
+        assert self.led_count == len(out)
 
         self.time_since_last_seed_planted += delta_time
 
-        self.seeds = [seed for seed in self.seeds if not seed.done]
+        self.remove_done_seeds()
         while self.time_since_last_seed_planted > SEED_FREQUENCY:
             self.plant_new_seed()
             self.time_since_last_seed_planted -= SEED_FREQUENCY
 
-        gear_values = scale_gear_values(gear_values)
-
-        lights = np.zeros((self.led_count, 3))
-
-        for seed in self.seeds:
-            seed.animated_intensity.tick(delta_time)
-
-        for gear, (gear_value, colour) in enumerate(
-            zip(gear_values, self.colours, strict=True)
-        ):
-            layer = np.zeros((self.led_count, 3))
+        self.time += delta_time
 
-            for seed in self.seeds:
-                if seed.gear == gear:
-                    influence = seed.influence()
-                    colours = influence[:, np.newaxis] * colour
-                    indices = (seed.position + np.arange(len(colours))) % len(layer)
-                    layer[indices] += colours
-
-            layer *= gear_value / 255
-
-            lights = (lights + layer).clip(max=255)
-
-        return lights.round().astype(int).tolist()
-
-
-@dataclass
-class Seed:
-    position: int
-    gear: int
+        # an outer product, as a broadcasting multiply would buffer
+        np.matmul(
+            self.intensities()[:, np.newaxis],
+            self.kernel[np.newaxis, :],
+            out=self.splat_weights,
+        )
 
-    influence_size: int
+        self.gear_light.fill(0)
+        np.add.at(self.gear_light.reshape(-1), self.splat_indices, self.splat_weights)
 
-    animated_intensity: AnimatedValue
+        scaled_values = np.array(scale_gear_values(gear_values), dtype=np.float32)
+        np.multiply(
+            self.colours, scaled_values[:, np.newaxis] / 255, out=self.gear_colours
+        )
 
-    @property
-    def done(self):
-        return self.animated_intensity.finished_animating
+        # light is only ever added, so saturating once matches saturating per gear
+        np.matmul(self.gear_light, self.gear_colours, out=out)
+        np.minimum(out, 255, out=out)
+        np.rint(out, out=out)
 
-    def intensity(self) -> float:
-        return self.animated_intensity.value()
 
-    @property
-    def influence_center(self):
-        return self.influence_size // 2
-
-    def influence(self):
-        values = np.arange(self.influence_size)
-        a = (self.influence_size / 2) ** -2
-        return (1.0 - a * (self.influence_center - values) ** 2).clip(
-            min=0
-        ) * self.intensity()
+def influence_kernel(influence_size: int) -> np.ndarray:
+    values = np.arange(influence_size)
+    center = influence_size // 2
+    a = (influence_size / 2) ** -2
+    return (1.0 - a * (center - values) ** 2).clip(min=0).astype(np.float32)
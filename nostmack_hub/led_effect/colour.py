@@ -1,5 +1,12 @@
+from typing import Callable
+
+import numpy as np
+
 Colour = tuple[int, int, int]
 
+# (led_count, 3) array of float32 channel values in the range 0-255
+Frame = np.ndarray
+
 
 def add_colours(a: Colour, b: Colour) -> Colour:
     return map_colour((a[0] + b[0], a[1] + b[1], a[2] + b[2]), lambda c: min(c, 255))
@@ -15,3 +22,55 @@ def scale_colour(colour, intensity):
 
 def map_colour(colour: Colour, f) -> Colour:
     return (f(colour[0]), f(colour[1]), f(colour[2]))
+
+
+# frame blending functions blend `b` into `a` in place
+
+
+def add_frames(a: Frame, b: Frame):
+    np.add(a, b, out=a)
+    np.minimum(a, 255, out=a)
+
+
+def subtract_frames(a: Frame, b: Frame):
+    np.subtract(a, b, out=a)
+    np.maximum(a, 0, out=a)
+
+
+FRAME_BLENDING_FNS: dict[Callable, Callable[[Frame, Frame], None]] = {
+    add_colours: add_frames,
+    subtract_colours: subtract_frames,
+}
+
+
+def frame_blending_fn(
+    blending_fn: Callable[[Colour, Colour], Colour],
+) -> Callable[[Frame, Frame], None]:
+    if (frame_fn := FRAME_BLENDING_FNS.get(blending_fn)) is not None:
+        return frame_fn
+
+    def blend(a: Frame, b: Frame):
+        a[:] = colours_to_frame(
+            [
+                blending_fn(light, colour)
+                for light, colour in zip(
+                    frame_to_colours(a), frame_to_colours(b), strict=True
+                )
+            ]
+        )
+
+    return blend
+
+
+def colours_to_frame(colours: list[Colour]) -> Frame:
+    return np.array(colours, dtype=np.float32).reshape(-1, 3)
+
+
+def frame_to_colours(frame: Frame) -> list[Colour]:
+    return list(map(tuple, frame.round().astype(int).tolist()))
+
+
+def frame_to_uint8(frame: Frame) -> np.ndarray:
+    if frame.dtype == np.uint8:
+        return frame
+    return frame.round().clip(0, 255).astype(np.uint8)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+
+from nostmack_hub.led_effect.colour import Frame
+
+
+class FramePool:
+    def __init__(self, led_count: int):
+        self.led_count = led_count
+        self._free: list[Frame] = []
+
+    def acquire(self) -> Frame:
+        if self._free:
+            return self._free.pop()
+        return np.zeros((self.led_count, 3), dtype=np.float32)
+
+    def release(self, frame: Frame):
+        self._free.append(frame)
+
+
+class FrameCache:
+    # Rendered frames keyed on everything they depend on, evicting the least
+    # recently used frame once more than `size` are cached.
+    def __init__(self, size: int):
+        self.size = size
+        self._frames: OrderedDict[Hashable, Frame] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def get(self, key: Hashable) -> Frame | None:
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+        return frame
+
+    # A frame to render into before `put`ting it. Once the cache is full this
+    # is the least recently used frame, evicted, so misses don't allocate.
+    def acquire(self, shape: tuple[int, ...]) -> Frame:
+        if len(self._frames) >= self.size:
+            _, frame = self._frames.popitem(last=False)
+            if frame.shape == shape:
+                return frame
+        return np.empty(shape, dtype=np.float32)
+
+    def put(self, key: Hashable, frame: Frame):
+        self._frames[key] = frame
+        self._frames.move_to_end(key)
+        if len(self._frames) > self.size:
+            self._frames.popitem(last=False)
@@ -1,19 +1,66 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import functools
+
+import numpy as np
+
 from nostmack_hub.gamma_correction import GAMMA_CORRECTION
-from nostmack_hub.led_effect import LedEffect
-from nostmack_hub.led_effect.colour import map_colour
+from nostmack_hub.led_effect import ArrayLedEffect, LedEffect, calculate_frame_into
+from nostmack_hub.led_effect.colour import Frame
+from nostmack_hub.led_effect.frame_pool import FramePool
+
+GAMMA_CORRECTION_LUT = np.array(GAMMA_CORRECTION, dtype=np.float32)
 
 
 @dataclass
-class GammaCorrection(LedEffect):
+class GammaCorrection(ArrayLedEffect):
     inner: LedEffect
+    # scale the gamma corrected output, overall and per channel
+    brightness: float = 1.0
+    white_balance: tuple[float, float, float] = (1.0, 1.0, 1.0)
+    channels: np.ndarray = field(
+        init=False, default_factory=lambda: np.zeros((0, 3), dtype=np.intp)
+    )
+
+    def __post_init__(self):
+        # the combined table is indexed by channel, so it needs all three
+        if len(self.white_balance) != 3:
+            raise ValueError(
+                f"White balance needs a red, green and blue scale, not {self.white_balance}"
+            )
+        if self.brightness < 0:
+            raise ValueError(f"Brightness must not be negative, not {self.brightness}")
+
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        calculate_frame_into(self.inner, gear_values, delta_time, out, frames)
+
+        if self.channels.shape != out.shape:
+            self.channels = np.zeros(out.shape, dtype=np.intp)
+
+        np.rint(out, out=out)
+        np.minimum(out, 255, out=out)
+        np.maximum(out, 0, out=out)
+        np.copyto(self.channels, out, casting="unsafe")
+
+        # look up each channel in its own part of the combined table
+        np.add(self.channels, channel_offsets(len(out)), out=self.channels)
+        lut = colour_correction_lut(self.brightness, tuple(self.white_balance))
+        np.take(lut, self.channels, out=out, mode="clip")
+
 
-    def calculate(self, gear_values: list[int], led_count, delta_time):
-        lights = self.inner.calculate(gear_values, led_count, delta_time)
+# Gamma correction, brightness and white balance in one table of 256 entries
+# per channel, only rebuilt when the settings change.
+@functools.lru_cache(maxsize=16)
+def colour_correction_lut(
+    brightness: float, white_balance: tuple[float, float, float]
+) -> np.ndarray:
+    scales = brightness * np.array(white_balance, dtype=np.float32)
+    lut = np.rint(scales[:, np.newaxis] * GAMMA_CORRECTION_LUT)
+    return np.clip(lut, 0, 255).astype(np.float32).reshape(-1)
 
-        lights = [
-            map_colour(light, lambda channel: GAMMA_CORRECTION[channel])
-            for light in lights
-        ]
 
-        return lights
+@functools.cache
+def channel_offsets(led_count: int) -> np.ndarray:
+    # a full frame rather than broadcasting, which would make numpy buffer
+    return np.tile(np.arange(3, dtype=np.intp) * 256, (led_count, 1))
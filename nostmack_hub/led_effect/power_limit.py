@@ -0,0 +1,53 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from nostmack_hub.led_effect import ArrayLedEffect, LedEffect, calculate_frame_into
+from nostmack_hub.led_effect.colour import Frame
+from nostmack_hub.led_effect.frame_pool import FramePool
+
+# WLED's estimate for WS2812B strips: the current of one LED at full white...
+LED_MILLIAMPS = 55
+# ...and of every LED, even when it is off
+IDLE_MILLIAMPS = 1
+
+
+@dataclass
+class PowerLimit(ArrayLedEffect):
+    # Scales frames down to stay within the supply's budget. WLED's own limiter
+    # doesn't apply to realtime frames, so this should wrap the final output,
+    # after gamma correction.
+    inner: LedEffect
+    budget_milliamps: float
+    led_milliamps: float = LED_MILLIAMPS
+    idle_milliamps: float = IDLE_MILLIAMPS
+    limited_frames: int = field(default=0, init=False)
+    limiting: bool = field(default=False, init=False)
+
+    def calculate_into(
+        self, gear_values: list[int], delta_time: int, out: Frame, frames: FramePool
+    ):
+        calculate_frame_into(self.inner, gear_values, delta_time, out, frames)
+
+        idle_milliamps = self.idle_milliamps * len(out)
+        budget = max(self.budget_milliamps - idle_milliamps, 0)
+        milliamps = self.milliamps(out)
+        limiting = milliamps > budget
+
+        if limiting != self.limiting:
+            if limiting:
+                needed = milliamps + idle_milliamps
+                print(f"Power limit: frame needs {needed:.0f} mA, limiting")
+            else:
+                print(f"Power limit: off, {self.limited_frames} frames limited")
+            self.limiting = limiting
+
+        if limiting:
+            self.limited_frames += 1
+            np.multiply(out, budget / milliamps, out=out)
+            # round down, so the frame stays within budget
+            np.floor(out, out=out)
+
+    # current drawn by the lit channels, on top of the idle current
+    def milliamps(self, frame: Frame) -> float:
+        return float(frame.sum()) * self.led_milliamps / (3 * 255)
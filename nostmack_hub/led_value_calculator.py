@@ -1,26 +1,45 @@
 from dataclasses import dataclass
+from typing import Protocol, Sequence
+import numpy as np
 from pygame.time import Clock
 
-from nostmack_hub.led_effect import LedEffect
-from nostmack_hub.gear import Gear
+from nostmack_hub.led_effect import LedEffect, calculate_frame_into
+from nostmack_hub.led_effect.frame_pool import FramePool
+from nostmack_hub.gear import Gear, gear_values
 from nostmack_hub.wled import LedValues
 
 
+class FrameClock(Protocol):
+    def tick(self) -> int:
+        raise NotImplementedError
+
+
 @dataclass
 class LedEffectFixedCount:
     effect: LedEffect
     led_count: int
-    clock: Clock = Clock()
+    clock: FrameClock = Clock()
+
+    def __post_init__(self):
+        self.frames = FramePool(self.led_count)
+        self.frame = self.frames.acquire()
+        self.output = np.zeros((self.led_count, 3), dtype=np.uint8)
 
     def calculate(self, gear_values: list[int]):
-        return self.effect.calculate(gear_values, self.led_count, self.clock.tick())
+        return self.render(gear_values, self.clock.tick())
+
+    def render(self, gear_values: list[int], delta_time: int):
+        calculate_frame_into(
+            self.effect, gear_values, delta_time, self.frame, self.frames
+        )
+        np.copyto(self.output, self.frame, casting="unsafe")
+        return self.output
 
 
 @dataclass
 class LedValueCalculator(LedValues):
-    gears: list[Gear]
+    gears: Sequence[Gear]
     effect: LedEffectFixedCount
 
     def led_values(self):
-        gear_values = [gear.value.inner for gear in self.gears]
-        return self.effect.calculate(gear_values)
+        return self.effect.calculate(gear_values(self.gears))
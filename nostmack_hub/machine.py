@@ -1,17 +1,20 @@
 import asyncio
-from typing import AsyncGenerator
+from contextlib import nullcontext
+import inspect
+from typing import AsyncGenerator, Awaitable
 
 from pygame.mixer import Sound
 
+from nostmack_hub.esp_listener import EspBatch
 from nostmack_hub.led_effect import LedEffect
-from nostmack_hub.gear import Gear
+from nostmack_hub.gear import Gear, GearBank, discharge_gears, gear_sequence, wait_all
 from nostmack_hub.led_value_calculator import LedEffectFixedCount, LedValueCalculator
 from nostmack_hub.machine_state import MachineState
+from nostmack_hub.render_thread import RenderThread
 from nostmack_hub.sounds import Sounds
-from nostmack_hub.wled import WledProtocol
+from nostmack_hub.wled import LedValues, WledProtocol
 
-
-EspEvents = AsyncGenerator[tuple[int, int], None]
+EspEvents = AsyncGenerator[tuple[int, int] | EspBatch, None]
 
 
 class Machine:
@@ -24,50 +27,78 @@ class Machine:
         wled: WledProtocol,
         effect: LedEffectFixedCount,
         sounds: Sounds,
-        finale: Sound,
+        finale: Sound | Awaitable[Sound],
         finale_duration: int,
+        render_in_thread: bool = False,
     ):
         self.esp_mapping = esp_mapping
+        self.gears = gear_sequence(list(esp_mapping.values()))
         self.esp_events = esp_events
         self.wled = wled
         self.effect = effect
         self.sounds = sounds
         self.finale = finale
         self.finale_duration = finale_duration
+        self.render_in_thread = render_in_thread
+        # one render thread for every charging period, started with the first,
+        # so the event loop never waits on a thread starting or stopping
+        self.render_thread: RenderThread | None = None
         self.state = MachineState()
 
-    @property
-    def gears(self):
-        return list(self.esp_mapping.values())
-
     async def update_effects(self):
-        async for esp_id, count in self.esp_events:
-            if self.state.is_charged():
-                continue
-            if self.state.is_initial() and count != 0:
-                self.state.to_charging()
-
-            gear = self.esp_mapping.get(esp_id)
-            if gear is None:
-                continue
-            gear.turned(count)
+        async for events in self.esp_events:
+            match events:
+                case EspBatch(counts=counts):
+                    self.esps_turned(counts)
+                case (esp_id, count):
+                    self.esp_turned(esp_id, count)
+
+    def esp_turned(self, esp_id: int, count: int):
+        if self.state.is_charged():
+            return
+        if self.state.is_initial() and count != 0:
+            self.state.to_charging()
+
+        gear = self.esp_mapping.get(esp_id)
+        if gear is None:
+            return
+        gear.turned(count)
+
+    def esps_turned(self, counts: dict[int, int]):
+        if not isinstance(self.gears, GearBank):
+            for esp_id, count in counts.items():
+                self.esp_turned(esp_id, count)
+            return
+
+        if self.state.is_charged():
+            return
+        if self.state.is_initial() and any(counts.values()):
+            self.state.to_charging()
+
+        gears = [
+            (gear.index, count)
+            for esp_id, count in counts.items()
+            if (gear := self.esp_mapping.get(esp_id)) is not None
+        ]
+        if gears:
+            self.gears.turned(*zip(*gears))
 
     async def check_discharged(self):
         while True:
-            if not all(g.is_discharged() for g in self.gears):
-                await asyncio.sleep(1)
-                continue
+            await wait_all(self.gears, Gear.is_discharged)
 
-            touches = [g.touched_event() for g in self.gears]
+            touches = [g.touched.generation for g in self.gears]
             await asyncio.sleep(5)
-            any_gears_touched = any(touch.is_set() for touch in touches)
+            any_gears_touched = any(
+                g.touched.fired_since(touch)
+                for g, touch in zip(self.gears, touches, strict=True)
+            )
             if not any_gears_touched:
                 self.state.to_initial()
                 return
 
     async def check_charged(self):
-        while not all(g.is_charged() for g in self.gears):
-            await asyncio.sleep(0.1)
+        await wait_all(self.gears, Gear.is_charged)
         self.state.to_charged()
 
     async def initial(self):
@@ -76,28 +107,50 @@ class Machine:
     async def charging(self):
         await self.wled.set_live()
 
+        with self.led_values() as led_values:
+            await self.charging_tasks(led_values)
+
+    async def charging_tasks(self, led_values: LedValues):
         async with asyncio.TaskGroup() as tg:
-            tg.create_task(self.wled.keep_updated(self.led_value_calculator))
+            tg.create_task(self.wled.keep_updated(led_values))
             tg.create_task(self.sounds.play_sounds())
 
             tg.create_task(self.check_charged())
             tg.create_task(self.check_discharged())
-
-            for gear in self.gears:
-                tg.create_task(gear.discharge_task())
+            tg.create_task(discharge_gears(self.gears))
 
     @property
     def led_value_calculator(self):
         return LedValueCalculator(gears=self.gears, effect=self.effect)
 
+    def led_values(self):
+        if self.render_in_thread:
+            if self.render_thread is None:
+                self.render_thread = RenderThread(self.gears, self.effect)
+                self.render_thread.start()
+            return nullcontext(self.render_thread)
+        return nullcontext(self.led_value_calculator)
+
     async def charged(self):
         for gear in self.gears:
             gear.reset()
         await self.wled.set_preset(2)
-        self.finale.play()
+        await self.play_finale()
         await asyncio.sleep(self.finale_duration)
         self.state.to_initial()
 
+    # The finale may still be loading when the machine is charged. If it failed
+    # to load, the finale goes ahead without it.
+    async def play_finale(self):
+        finale = self.finale
+        if inspect.isawaitable(finale):
+            try:
+                finale = await finale
+            except Exception as error:
+                print(f"Finale sound failed to load, playing without it: {error!r}")
+                return
+        finale.play()
+
     async def state_tasks(self):
         while True:
             async with asyncio.TaskGroup() as tg:
@@ -123,7 +176,11 @@ class Machine:
             await asyncio.sleep(1)
 
     async def run(self):
-        async with asyncio.TaskGroup() as tg:
-            tg.create_task(self.update_effects())
-            tg.create_task(self.state_tasks())
-            tg.create_task(self.print_gear_values())
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self.update_effects())
+                tg.create_task(self.state_tasks())
+                tg.create_task(self.print_gear_values())
+        finally:
+            if self.render_thread is not None:
+                self.render_thread.stop()
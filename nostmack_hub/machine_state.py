@@ -1,18 +1,18 @@
-import asyncio
 from typing import Literal
 
+from nostmack_hub.pulse import Pulse, PulseWatch
+
 
 class MachineState:
     def __init__(self):
         self.state: Literal["initial", "charging", "charged"] = "initial"
-        self._changed_event = asyncio.Event()
+        self.changed = Pulse()
 
     def _on_change(self):
-        self._changed_event.set()
-        self._changed_event = asyncio.Event()
+        self.changed.fire()
 
-    def changed_event(self):
-        return self._changed_event
+    def changed_event(self) -> PulseWatch:
+        return self.changed.watch()
 
     def to_initial(self):
         if self.is_initial():
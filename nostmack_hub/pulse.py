@@ -0,0 +1,43 @@
+import asyncio
+
+
+class Pulse:
+    # A notification that can fire any number of times. Unlike replacing an
+    # `asyncio.Event` on every change, firing allocates nothing: it bumps a
+    # generation counter and wakes whoever is waiting at that moment.
+    def __init__(self):
+        self.generation = 0
+        self._event = asyncio.Event()
+
+    def fire(self):
+        self.generation += 1
+        # wakes the current waiters, later waiters wait for the next pulse
+        self._event.set()
+        self._event.clear()
+
+    def fired_since(self, generation: int) -> bool:
+        return self.generation != generation
+
+    async def wait(self):
+        await self._event.wait()
+
+    def watch(self) -> "PulseWatch":
+        return PulseWatch(self, self.generation)
+
+
+class PulseWatch:
+    # Event-like view of a pulse: set once the pulse has fired after the watch
+    # was taken.
+    __slots__ = ("pulse", "generation")
+
+    def __init__(self, pulse: Pulse, generation: int):
+        self.pulse = pulse
+        self.generation = generation
+
+    def is_set(self) -> bool:
+        return self.pulse.fired_since(self.generation)
+
+    async def wait(self):
+        while not self.is_set():
+            await self.pulse.wait()
+        return True
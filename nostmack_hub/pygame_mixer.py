@@ -1,12 +1,25 @@
 from contextlib import contextmanager
 import pygame
 
+FREQUENCY = 44100
+# samples per mixer buffer for each latency mode, ~46ms and ~6ms at 44.1kHz
+BUFFER_SIZES = {"default": 2048, "low": 256}
+
 
 @contextmanager
-def init():
-    pygame.mixer.init(buffer=2048)
+def init(frequency: int = FREQUENCY, buffer: int = BUFFER_SIZES["default"]):
+    pygame.mixer.init(frequency=frequency, buffer=buffer)
     try:
         pygame.mixer.set_num_channels(12)
         yield
     finally:
         pygame.mixer.quit()
+
+
+# an exact `buffer` size overrides the `latency` mode, which is still checked
+def buffer_size(latency: str | None, buffer: int | None) -> int:
+    if latency not in BUFFER_SIZES.keys() | {None}:
+        raise ValueError(f"Unknown audio latency {latency}, use one of {BUFFER_SIZES}")
+    if buffer is not None:
+        return buffer
+    return BUFFER_SIZES[latency or "default"]
@@ -0,0 +1,99 @@
+import threading
+from typing import Sequence
+
+import numpy as np
+
+from nostmack_hub.gear import Gear, gear_values
+from nostmack_hub.led_value_calculator import LedEffectFixedCount
+from nostmack_hub.wled import LedValues
+
+
+class FrameRing:
+    # Single producer, single consumer, without locks. The producer only ever
+    # writes the slot after the latest published one, so the slot the consumer
+    # copies is only rewritten once two more frames have been published. If
+    # that happened during the copy, the consumer copies again.
+    def __init__(self, led_count: int, size: int = 3):
+        self.frames = np.zeros((size, led_count, 3), dtype=np.uint8)
+        self.published = 0
+
+    def write_slot(self) -> np.ndarray:
+        return self.frames[self.published % len(self.frames)]
+
+    def publish(self):
+        self.published += 1
+
+    def read_latest(self, out: np.ndarray) -> np.ndarray:
+        while True:
+            published = self.published
+            np.copyto(out, self.frames[(published - 1) % len(self.frames)])
+            if self.published - published < len(self.frames) - 1:
+                return out
+
+
+class RenderThread(LedValues):
+    def __init__(self, gears: Sequence[Gear], effect: LedEffectFixedCount):
+        self.gears = gears
+        self.effect = effect
+        self.ring = FrameRing(effect.led_count)
+        # owned by the event loop, the frame last handed out
+        self.frame = np.zeros((effect.led_count, 3), dtype=np.uint8)
+
+        # replaced wholesale by the event loop, read by the render thread
+        self.snapshot: tuple[Sequence[int], int] = ([0] * len(gears), 0)
+        self.animation_time = 0
+
+        self.render_requested = threading.Event()
+        self.stopping = False
+        self.error: BaseException | None = None
+        self.thread = threading.Thread(target=self._run, name="render", daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping = True
+        self.render_requested.set()
+        self.thread.join()
+
+    # Called from the event loop once per frame: hands the current gear values to
+    # the render thread and returns the most recently finished frame. It never
+    # waits for the render thread, so until the first frame is finished the
+    # frame is black.
+    def led_values(self):
+        self.animation_time += self.effect.clock.tick()
+        # a copy, the values of a gear bank are updated in place
+        values = np.array(gear_values(self.gears))
+        self.snapshot = (values, self.animation_time)
+        self.render_requested.set()
+
+        if self.error is not None:
+            raise self.error
+        if self.ring.published == 0:
+            return self.frame
+        return self.ring.read_latest(self.frame)
+
+    def _run(self):
+        rendered_time = 0
+        try:
+            while True:
+                self.render_requested.wait()
+                self.render_requested.clear()
+                if self.stopping:
+                    return
+
+                gear_values, animation_time = self.snapshot
+                frame = self.effect.render(gear_values, animation_time - rendered_time)
+                rendered_time = animation_time
+
+                np.copyto(self.ring.write_slot(), frame)
+                self.ring.publish()
+        except BaseException as e:
+            self.error = e
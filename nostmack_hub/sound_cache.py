@@ -0,0 +1,48 @@
+import hashlib
+import threading
+from pathlib import Path
+
+import pygame.mixer
+from pygame.mixer import Sound
+
+
+class SoundCache:
+    # Decoding a compressed sound takes a while on the Pi, so each one is only
+    # decoded once: its raw samples are stored in `directory`, keyed by the
+    # file's contents and the mixer's format, and read back on later loads.
+    # pygame copies the samples into a Sound of its own, so this saves the
+    # decoding, not memory.
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def load(self, path: Path) -> Sound:
+        cached = self.directory / self.key(path)
+        if not cached.exists():
+            self.store(cached, Sound(path).get_raw())
+
+        return Sound(buffer=cached.read_bytes())
+
+    def key(self, path: Path) -> str:
+        frequency, size, channels = pygame.mixer.get_init()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        sample_format = f"{'s' if size < 0 else 'u'}{abs(size)}"
+        return f"{digest}-{frequency}-{sample_format}-{channels}.pcm"
+
+    def store(self, cached: Path, samples: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # written whole or not at all, in case we're stopped halfway, and per
+        # thread as sounds with the same contents may be loaded side by side
+        partial = cached.with_suffix(f".{threading.get_ident()}.partial")
+        partial.write_bytes(samples)
+        partial.replace(cached)
+
+
+class NoSoundCache:
+    def load(self, path: Path) -> Sound:
+        return Sound(path)
+
+
+def sound_cache(directory: Path | None) -> SoundCache | NoSoundCache:
+    if directory is None:
+        return NoSoundCache()
+    return SoundCache(directory)
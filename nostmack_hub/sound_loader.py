@@ -0,0 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from pygame.mixer import Sound
+
+LOAD_THREADS = 2
+
+
+class SoundLoader:
+    # Loads sounds on a few threads, in the order they are asked for, so the
+    # hub can listen to the ESPs and drive the LEDs while they decode.
+    def __init__(self, load: Callable[[Path], Sound], threads: int = LOAD_THREADS):
+        self.load = load
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix="sound-loader")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        # loads still running use the mixer, so wait for those before it quits
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    # `then` is called on the event loop with the sound once it has loaded
+    def load_later(
+        self, path: Path, then: Callable[[Sound], None] | None = None
+    ) -> asyncio.Future[Sound]:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, self.load, path)
+        if then is not None:
+            future.add_done_callback(lambda future: loaded(path, future, then))
+        return future
+
+
+def loaded(path: Path, future: asyncio.Future[Sound], then: Callable[[Sound], None]):
+    if future.cancelled():
+        return
+    if (error := future.exception()) is not None:
+        print(f"Failed to load sound {path}: {error!r}")
+        return
+    then(future.result())
@@ -0,0 +1,199 @@
+import asyncio
+import threading
+
+import numpy as np
+import pygame.mixer
+from pygame.mixer import Sound
+
+# ~12ms at 44.1kHz
+BLOCK_SIZE = 512
+# pygame queues one sound behind the playing one, each is this many blocks, so
+# a stall of the event loop for a block doesn't run the channel dry
+QUEUED_BLOCKS = 2
+
+
+class SoftwareMixer:
+    # Mixes any number of voices into one stream, a block at a time, and plays
+    # it on a single reserved pygame channel. Voices are kept in slots of
+    # parallel arrays; a volume change ramps over one block rather than
+    # jumping, so there are no clicks when gears step down. Like a pygame
+    # `Sound`, a voice played once while still playing overlaps itself, each
+    # play gets a slot of its own that shares the voice's samples.
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        frequency, size, channels = pygame.mixer.get_init()
+        if size != -16:
+            raise ValueError(f"Software mixer needs signed 16 bit audio, not {size}")
+        self.frequency = frequency
+        self.channels = channels
+        self.block_size = block_size
+
+        # voices are added from the sound loader's threads
+        self.lock = threading.Lock()
+        self.samples: list[np.ndarray] = []
+        # the voice each slot plays for, the index of that voice's first slot
+        self.owners = np.zeros(0, dtype=np.int64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.playing = np.zeros(0, dtype=np.bool_)
+        # times left to repeat after the current play, -1 repeats forever
+        self.loops = np.zeros(0, dtype=np.int64)
+        self.fading = np.zeros(0, dtype=np.bool_)
+        # played but not mixed yet, so volume changes apply at once
+        self.fresh = np.zeros(0, dtype=np.bool_)
+        self.positions = np.zeros(0, dtype=np.int64)
+        self.gains = np.zeros(0, dtype=np.float32)
+        self.targets = np.zeros(0, dtype=np.float32)
+        # gain change per frame on the way to `targets`
+        self.slopes = np.zeros(0, dtype=np.float32)
+
+        self.ramp = np.arange(1, block_size + 1, dtype=np.float32)
+        self.offsets = np.arange(block_size, dtype=np.int64)
+        self.block = np.zeros((block_size, channels), dtype=np.float32)
+        self.queued = np.zeros((QUEUED_BLOCKS * block_size, channels), dtype=np.int16)
+        # set when a voice is played, so an idle mixer doesn't mix silence
+        self.woken = asyncio.Event()
+
+    def voice(self, sound: Sound) -> "Voice":
+        # kept as 16 bit samples, only a block at a time is converted
+        samples = np.frombuffer(sound.get_raw(), dtype=np.int16)
+        samples = samples.reshape(-1, self.channels)
+        with self.lock:
+            return Voice(self, self._add_slot(samples, len(self.samples), 1))
+
+    # the caller holds the lock
+    def _add_slot(self, samples: np.ndarray, owner: int, gain: float) -> int:
+        self.samples.append(samples)
+        self.owners = np.append(self.owners, owner)
+        self.lengths = np.append(self.lengths, len(samples))
+        self.playing = np.append(self.playing, False)
+        self.loops = np.append(self.loops, 0)
+        self.fading = np.append(self.fading, False)
+        self.fresh = np.append(self.fresh, False)
+        self.positions = np.append(self.positions, 0)
+        self.gains = np.append(self.gains, np.float32(gain))
+        self.targets = np.append(self.targets, np.float32(gain))
+        self.slopes = np.append(self.slopes, np.float32(0))
+        return len(self.samples) - 1
+
+    def mix_block(self, out: np.ndarray | None = None) -> np.ndarray:
+        with self.lock:
+            active = np.flatnonzero(self.playing)
+            gains = self.gains[active]
+            deltas = self.targets[active] - gains
+            steps = np.minimum(
+                np.outer(self.slopes[active], self.ramp), np.abs(deltas)[:, np.newaxis]
+            )
+            envelopes = gains[:, np.newaxis] + np.sign(deltas)[:, np.newaxis] * steps
+
+            self.block.fill(0)
+            for index, envelope in zip(active.tolist(), envelopes):
+                samples = self.samples[index]
+                frames = self.positions[index] + self.offsets
+                loops = self.loops[index]
+                if loops >= 0:
+                    # silent past the end of the last repeat
+                    envelope = np.where(frames // len(samples) <= loops, envelope, 0)
+                frames %= len(samples)
+                self.block += samples[frames] * envelope[:, np.newaxis]
+
+            self.gains[active] = envelopes[:, -1]
+            self.fresh[active] = False
+            self.positions[active] += self.block_size
+            repeats = self.positions // self.lengths
+            self.positions %= self.lengths
+            finite = self.loops >= 0
+            self.loops[finite] -= repeats[finite]
+            finished = finite & (self.loops < 0)
+            # not to be mistaken for repeating forever
+            self.loops[finished] = 0
+            faded = self.fading & (self.gains == 0)
+            self.playing &= ~(finished | faded)
+
+        np.clip(self.block, -32768, 32767, out=self.block)
+        if out is None:
+            return self.block.astype(np.int16)
+        np.copyto(out, self.block, casting="unsafe")
+        return out
+
+    # volume, stopping and fading apply to every play of a voice, as they do
+    # to every channel playing a pygame `Sound`
+    def ramp_to(self, index: int, target: float, frames: int):
+        with self.lock:
+            slots = self.owners == index
+            self.targets[slots] = target
+            self.slopes[slots] = np.abs(target - self.gains[slots]) / max(frames, 1)
+            self.gains[slots & (self.fresh | ~self.playing)] = target
+
+    def play(self, index: int, loops: int):
+        with self.lock:
+            if loops < 0:
+                # repeated until stopped, so there is only ever one play
+                slot = index
+            else:
+                free = np.flatnonzero((self.owners == index) & ~self.playing)
+                if len(free):
+                    slot = free[0]
+                else:
+                    slot = self._add_slot(
+                        self.samples[index], index, self.targets[index]
+                    )
+                self.gains[slot] = self.targets[slot] = self.targets[index]
+            self.playing[slot] = True
+            self.loops[slot] = max(loops, -1)
+            self.fading[slot] = False
+            self.fresh[slot] = True
+            self.positions[slot] = 0
+        self.woken.set()
+
+    def stop(self, index: int):
+        with self.lock:
+            self.playing[self.owners == index] = False
+
+    def fadeout(self, index: int, time: int):
+        self.ramp_to(index, 0, time * self.frequency // 1000)
+        with self.lock:
+            self.fading[self.owners == index] = True
+
+    def mix_queued(self) -> Sound:
+        for start in range(0, len(self.queued), self.block_size):
+            self.mix_block(self.queued[start : start + self.block_size])
+        # pygame copies the samples, so `queued` can be mixed into again
+        return Sound(buffer=self.queued)
+
+    async def run(self):
+        pygame.mixer.set_reserved(1)
+        channel = pygame.mixer.Channel(0)
+        block_time = self.block_size / self.frequency
+        while True:
+            self.woken.clear()
+            if not self.playing.any():
+                # what is queued plays out, then the channel falls silent
+                await self.woken.wait()
+            if not channel.get_busy():
+                channel.play(self.mix_queued())
+            elif channel.get_queue() is None:
+                channel.queue(self.mix_queued())
+            await asyncio.sleep(block_time / 2)
+
+
+class Voice:
+    # A sound played through a `SoftwareMixer`, standing in for a pygame
+    # `Sound` so `Sounds` and the finale don't need to know which is used.
+    def __init__(self, mixer: SoftwareMixer, index: int):
+        self.mixer = mixer
+        self.index = index
+
+    def play(self, loops: int = 0):
+        self.mixer.play(self.index, loops)
+
+    def stop(self):
+        self.mixer.stop(self.index)
+
+    def set_volume(self, volume: float):
+        volume = min(max(volume, 0.0), 1.0)
+        self.mixer.ramp_to(self.index, volume, self.mixer.block_size)
+
+    def get_volume(self) -> float:
+        return float(self.mixer.targets[self.index])
+
+    def fadeout(self, time: int):
+        self.mixer.fadeout(self.index, time)
@@ -1,37 +1,88 @@
 import asyncio
 
 import random
+from typing import Callable
+
 from pygame.mixer import Sound
 
-from nostmack_hub.gear import Gear
+from nostmack_hub.gear import Gear, next_value_change
 
 
 class Sounds:
-    def __init__(self, gears: list[Gear], sounds: list[Sound], ding: Sound):
+    # `sounds` and `ding` may still be loading, `add_sound` and `set_ding` hand
+    # them over once they are ready. Until then gears play without a sound.
+    def __init__(
+        self, gears: list[Gear], sounds: list[Sound], ding: Sound | None = None
+    ):
         self.gears = gears
         self.sounds = sounds
         self.ding = ding
+        self._listeners: list[Callable[[], None]] = []
+
+    def add_sound(self, sound: Sound):
+        self.sounds.append(sound)
+        self._notify()
+
+    def set_ding(self, ding: Sound):
+        self.ding = ding
 
+    def _notify(self):
+        for listener in self._listeners:
+            listener()
+
+    # Follows the gear values, waking up only when a gear is touched or its
+    # value steps down while discharging. The mixer is only told about volumes
+    # that actually changed.
     async def play_sounds(self):
-        sounds = random.sample(self.sounds, len(self.gears))
+        loop = asyncio.get_running_loop()
+        sounds: list[Sound | None] = [None] * len(self.gears)
+        unused: list[Sound] = []
+        seen = 0
+        changed = asyncio.Event()
+        for gear in self.gears:
+            gear.subscribe(changed.set)
+        self._listeners.append(changed.set)
         try:
-            for sound in sounds:
-                sound.play(loops=-1)
-                sound.set_volume(0)
+            volumes = [0.0] * len(self.gears)
             dinged = [False] * len(self.gears)
             while True:
-                await asyncio.sleep(0.1)
-                for i, (gear, sound) in enumerate(zip(self.gears, sounds, strict=True)):
+                changed.clear()
+                unused += self.sounds[seen:]
+                seen = len(self.sounds)
+                for i, gear in enumerate(self.gears):
+                    if sounds[i] is None and unused:
+                        sound = unused.pop(random.randrange(len(unused)))
+                        sound.play(loops=-1)
+                        sound.set_volume(0)
+                        sounds[i] = sound
+                        volumes[i] = 0.0
+
                     volume = gear.value.inner / 255
-                    sound.set_volume(volume)
+                    if volume != volumes[i] and sounds[i] is not None:
+                        sounds[i].set_volume(volume)
+                        volumes[i] = volume
 
                     if gear.value.is_max:
+                        # a ding missed while it was loading stays missed
                         if not dinged[i]:
-                            self.ding.play()
+                            if self.ding is not None:
+                                self.ding.play()
                             dinged[i] = True
                     else:
                         dinged[i] = False
 
+                try:
+                    change = next_value_change(self.gears, loop.time())
+                    async with asyncio.timeout_at(change):
+                        await changed.wait()
+                except TimeoutError:
+                    pass
+
         except asyncio.CancelledError:
             for sound in sounds:
-                sound.fadeout(500)
+                if sound is not None:
+                    sound.fadeout(500)
+        finally:
+            self._listeners.remove(changed.set)
+            for gear in self.gears:
+                gear.unsubscribe(changed.set)
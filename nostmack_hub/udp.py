@@ -1,4 +1,7 @@
+import asyncio
 from contextlib import asynccontextmanager
+import socket
+
 import asyncio_dgram
 
 
@@ -11,10 +14,113 @@ async def connect(addr):
         socket.close()
 
 
+# binds `addr`, or adopts `sock` if given, which must already be bound
 @asynccontextmanager
-async def bind(addr):
-    socket = await asyncio_dgram.bind(addr)
+async def bind(addr, sock: socket.socket | None = None):
+    if sock is None:
+        socket = await asyncio_dgram.bind(addr)
+    else:
+        socket = await asyncio_dgram.from_socket(sock)
     try:
         yield socket
     finally:
         socket.close()
+
+
+# how long a first frame waits for its addresses to connect, and how long
+# an address that couldn't be resolved or connected waits before trying again
+CONNECT_TIMEOUT = 0.5
+RECONNECT_DELAY = 1.0
+
+
+class DatagramSender:
+    # Sends to each address on a socket of its own. Addresses are resolved and
+    # connected one by one in the background, so an address that can't be,
+    # say a switched off mirror whose mDNS name doesn't resolve, is retried
+    # later without holding up the others.
+    def __init__(self, addrs: list[tuple[str, int]]):
+        self.addrs = addrs
+        self.sockets: list[socket.socket | None] = [None] * len(addrs)
+        self.connecting: list[asyncio.Task | None] = [None] * len(addrs)
+        self.retry_at = [0.0] * len(addrs)
+        # addresses whose last attempt failed, so each failure is only reported once
+        self.failing: set[int] = set()
+
+    def connect_all(self) -> list[asyncio.Task]:
+        return [
+            task for i in range(len(self.addrs)) if (task := self._connect_later(i))
+        ]
+
+    def _connect_later(self, i: int) -> asyncio.Task | None:
+        loop = asyncio.get_running_loop()
+        if self.connecting[i] is not None or loop.time() < self.retry_at[i]:
+            return None
+        self.connecting[i] = asyncio.create_task(self._connect(i))
+        return self.connecting[i]
+
+    async def _connect(self, i: int):
+        loop = asyncio.get_running_loop()
+        host, port = self.addrs[i]
+        sock = None
+        try:
+            [(family, type, proto, _, addr), *_] = await loop.getaddrinfo(
+                host, port, type=socket.SOCK_DGRAM
+            )
+            sock = socket.socket(family, type, proto)
+            sock.setblocking(False)
+            await loop.sock_connect(sock, addr)
+        except OSError as error:
+            if sock is not None:
+                sock.close()
+            self._failed(i, error)
+            self.retry_at[i] = loop.time() + RECONNECT_DELAY
+        else:
+            self.sockets[i] = sock
+        finally:
+            self.connecting[i] = None
+
+    def _failed(self, i: int, error: OSError):
+        if i not in self.failing:
+            print(f"Sending to {self.addrs[i]} failed: {error!r}")
+            self.failing.add(i)
+
+    # Writes straight to the non-blocking sockets, so a whole batch costs one pass
+    # through the event loop. Only a full socket buffer makes it wait. A socket
+    # that fails, say an unreachable mirror, skips the batch without holding up
+    # the others.
+    async def send_all(self, packets):
+        loop = asyncio.get_running_loop()
+        for i, sock in enumerate(self.sockets):
+            if sock is None:
+                self._connect_later(i)
+                continue
+            try:
+                for packet in packets:
+                    try:
+                        sock.send(packet)
+                    except BlockingIOError:
+                        await loop.sock_sendall(sock, packet)
+            except OSError as error:
+                self._failed(i, error)
+            else:
+                self.failing.discard(i)
+
+    def close(self):
+        for task in self.connecting:
+            if task is not None:
+                task.cancel()
+        for sock in self.sockets:
+            if sock is not None:
+                sock.close()
+
+
+@asynccontextmanager
+async def sender(addrs: list[tuple[str, int]]):
+    datagrams = DatagramSender(addrs)
+    try:
+        # give the addresses a moment, so the first frame isn't dropped
+        if tasks := datagrams.connect_all():
+            await asyncio.wait(tasks, timeout=CONNECT_TIMEOUT)
+        yield datagrams
+    finally:
+        datagrams.close()
@@ -2,17 +2,24 @@ import asyncio
 from typing import Protocol
 
 import aiohttp
-from dataclasses import dataclass
-
-from nostmack_hub.dnrgb import dnrgb_packets
-from nostmack_hub.udp import connect
+from dataclasses import dataclass, field
+import numpy as np
 
+from nostmack_hub.dnrgb import DnrgbDeltaEncoder, DnrgbEncoder, dnrgb_encoder
+from nostmack_hub.frame_scheduler import FrameScheduler
+from nostmack_hub.udp import DatagramSender, sender
 
 UPDATE_FREQUENCY = 0.02
+DNRGB_PORT = 21324
+
+# a state change gives up after REQUEST_ATTEMPTS * REQUEST_TIMEOUT plus backoff
+REQUEST_TIMEOUT = 1
+REQUEST_ATTEMPTS = 3
+REQUEST_RETRY_DELAY = 0.1
 
 
 class LedValues(Protocol):
-    def led_values(self) -> list[tuple[int, int, int]]:
+    def led_values(self) -> np.ndarray:
         raise NotImplementedError
 
 
@@ -27,34 +34,224 @@ class WledProtocol(Protocol):
     async def keep_updated(self, led_values: LedValues):
         raise NotImplementedError
 
+    async def close(self):
+        pass
+
+
+class WledJsonApi:
+    # One long-lived session per Wled, so that state changes reuse a kept-alive
+    # connection and a cached DNS lookup of the (mDNS) controller address.
+    def __init__(self):
+        self.session: aiohttp.ClientSession | None = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ttl_dns_cache=None),
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                raise_for_status=True,
+            )
+        return self.session
+
+    async def post_state(self, address: str, state: dict):
+        session = self._session()
+        for attempt in range(REQUEST_ATTEMPTS):
+            try:
+                async with session.post(f"http://{address}/json/state/", json=state):
+                    return
+            except (aiohttp.ClientError, TimeoutError):
+                if attempt == REQUEST_ATTEMPTS - 1:
+                    raise
+                # the controller may have a new address or have dropped the connection
+                session.connector.clear_dns_cache()
+                await asyncio.sleep(REQUEST_RETRY_DELAY)
+
+    # Posts to every controller at once, so a slow one doesn't hold up the
+    # others. Controllers that fail are reported, the change only fails if
+    # none of them accepted it.
+    async def post_state_to_all(self, addresses: list[str], state: dict):
+        results = await asyncio.gather(
+            *(self.post_state(address, state) for address in addresses),
+            return_exceptions=True,
+        )
+        errors = [
+            (address, result)
+            for address, result in zip(addresses, results)
+            if isinstance(result, BaseException)
+        ]
+        for address, error in errors:
+            print(f"Setting {state} on {address} failed: {error!r}")
+        if errors and len(errors) == len(addresses):
+            raise errors[0][1]
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+
 
 @dataclass
 class Wled(WledProtocol):
     address: str
+    # controllers that show the same frame as `address`
+    mirror_addresses: list[str] = field(default_factory=list)
+    # send only changed LEDs, with a full frame every `keyframe_interval` frames
+    keyframe_interval: int | None = None
+    scheduler: FrameScheduler = field(
+        default_factory=lambda: FrameScheduler(UPDATE_FREQUENCY)
+    )
+    api: WledJsonApi = field(default_factory=WledJsonApi)
+
+    @property
+    def addresses(self):
+        return [self.address, *self.mirror_addresses]
+
+    async def set_preset(self, preset: int):
+        await self.api.post_state_to_all(self.addresses, {"ps": preset, "lor": 1})
+
+    async def set_live(self):
+        await self.api.post_state_to_all(self.addresses, {"lor": 0})
+
+    async def close(self):
+        await self.api.close()
+
+    async def keep_updated(self, led_values: LedValues):
+        addrs = [(address, DNRGB_PORT) for address in self.addresses]
+        async with sender(addrs) as socket:
+            encoder = None
+            self.scheduler.restart()
+            while True:
+                await self.scheduler.next_frame()
+                leds = led_values.led_values()
+                if encoder is None or encoder.led_count != len(leds):
+                    encoder = dnrgb_encoder(
+                        len(leds), keyframe_interval=self.keyframe_interval
+                    )
+                await update_wled(socket, encoder, leds)
+
+
+@dataclass
+class WledSegment:
+    # the LEDs start:stop of the rendered frame...
+    start: int
+    stop: int
+    # ...are shown by this controller, starting at its LED `offset`
+    address: str
+    offset: int = 0
+
+
+# Segments outside the frame would be sent short, and DNRGB can only address
+# a controller's first 2**16 LEDs, so both are rejected before anything runs.
+def check_segments(segments: list[WledSegment], led_count: int):
+    for segment in segments:
+        if not 0 <= segment.start < segment.stop <= led_count:
+            raise ValueError(f"Segment {segment} must cover LEDs within 0-{led_count}")
+        if not 0 <= segment.offset <= 2**16 - (segment.stop - segment.start):
+            raise ValueError(
+                f"Segment {segment} must end within the controller's first "
+                f"{2**16} LEDs"
+            )
+
+
+@dataclass
+class WledCluster(WledProtocol):
+    segments: list[WledSegment]
+    keyframe_interval: int | None = None
+    scheduler: FrameScheduler = field(
+        default_factory=lambda: FrameScheduler(UPDATE_FREQUENCY)
+    )
+    api: WledJsonApi = field(default_factory=WledJsonApi)
+
+    @property
+    def addresses(self):
+        return list(dict.fromkeys(segment.address for segment in self.segments))
 
     async def set_preset(self, preset: int):
-        async with aiohttp.ClientSession(
-            base_url=f"http://{self.address}/json/state/",
-            raise_for_status=True,
-        ) as session:
-            async with session.post("", json={"ps": preset, "lor": 1}) as response:
-                pass
+        await self.api.post_state_to_all(self.addresses, {"ps": preset, "lor": 1})
 
     async def set_live(self):
-        async with aiohttp.ClientSession(
-            base_url=f"http://{self.address}/json/state/",
-            raise_for_status=True,
-        ) as session:
-            async with session.post("", json={"lor": 0}) as response:
-                pass
+        await self.api.post_state_to_all(self.addresses, {"lor": 0})
+
+    async def close(self):
+        await self.api.close()
 
     async def keep_updated(self, led_values: LedValues):
-        async with connect((self.address, 21324)) as socket:
+        controllers = [
+            WledController(
+                address,
+                [segment for segment in self.segments if segment.address == address],
+                self.keyframe_interval,
+            )
+            for address in self.addresses
+        ]
+
+        async with asyncio.TaskGroup() as tg:
+            for controller in controllers:
+                tg.create_task(controller.keep_sending())
+
+            self.scheduler.restart()
             while True:
-                await update_wled(socket, led_values.led_values())
-                await asyncio.sleep(UPDATE_FREQUENCY)
+                await self.scheduler.next_frame()
+                leds = led_values.led_values()
+                for controller in controllers:
+                    controller.show(leds)
+
+
+class WledController:
+    # Sends the latest frame shown to it. If its controller is slow to accept
+    # packets, the frames shown in the meantime are skipped, not queued. If it
+    # can't be reached at all, it keeps retrying without affecting the others.
+    def __init__(
+        self, address: str, segments: list[WledSegment], keyframe_interval: int | None
+    ):
+        self.address = address
+        self.segments = segments
+        self.encoders = [
+            dnrgb_encoder(
+                segment.stop - segment.start,
+                keyframe_interval=keyframe_interval,
+                start_index=segment.offset,
+            )
+            for segment in segments
+        ]
+        self.leds: np.ndarray | None = None
+        self.frame_ready = asyncio.Event()
+        # reported once until a frame gets through again
+        self.failing = False
+
+    # copied, as the caller may reuse `leds` before the frame is sent
+    def show(self, leds: np.ndarray):
+        if self.leds is None or self.leds.shape != leds.shape:
+            self.leds = np.empty_like(leds)
+        np.copyto(self.leds, leds)
+        self.frame_ready.set()
+
+    async def keep_sending(self):
+        while True:
+            try:
+                await self.send_frames()
+            except OSError as error:
+                if not self.failing:
+                    print(f"Sending to {self.address} failed, retrying: {error!r}")
+                    self.failing = True
+                await asyncio.sleep(REQUEST_RETRY_DELAY)
+
+    async def send_frames(self):
+        async with sender([(self.address, DNRGB_PORT)]) as socket:
+            while True:
+                await self.frame_ready.wait()
+                self.frame_ready.clear()
+
+                # encode every segment before sending, so they all show one frame
+                packets = []
+                for segment, encoder in zip(self.segments, self.encoders, strict=True):
+                    packets += encoder.encode(self.leds[segment.start : segment.stop])
+                await socket.send_all(packets)
+                self.failing = False
 
 
-async def update_wled(socket, leds: list[tuple[int, int, int]]):
-    for packet in dnrgb_packets(leds):
-        await socket.send(packet)
+async def update_wled(
+    socket: DatagramSender,
+    encoder: DnrgbEncoder | DnrgbDeltaEncoder,
+    leds: np.ndarray,
+):
+    await socket.send_all(encoder.encode(leds))
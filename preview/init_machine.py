@@ -2,7 +2,7 @@ import asyncio
 from pathlib import Path
 from pygame.mixer import Sound
 
-from nostmack_hub.gear import Gear
+from nostmack_hub.gear import GearBank
 from nostmack_hub.machine import Machine
 from nostmack_hub.sounds import Sounds
 from preview.wled_mock import WledMock
@@ -22,13 +22,7 @@ def init_machine(
 
     wled = WledMock()
 
-    esp_mapping = {
-        0: Gear(5),
-        1: Gear(5),
-        2: Gear(5),
-        3: Gear(5),
-        4: Gear(5),
-    }
+    esp_mapping = dict(enumerate(GearBank([5, 5, 5, 5, 5])))
     sounds = list(map(Sound, Path(sound_pool).iterdir()))
     sounds = Sounds(
         gears=list(esp_mapping.values()),
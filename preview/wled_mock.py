@@ -28,5 +28,5 @@ class WledMock(WledProtocol):
 
     async def keep_updated(self, led_values: LedValues):
         while True:
-            self.state = WledRealtime(led_values.led_values())
+            self.state = WledRealtime(led_values.led_values().tolist())
             await asyncio.sleep(1 / 120)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from nostmack_hub.led_effect.animation import (
+    AnimatedValues,
+    Animations,
+    Curve,
+    Dissapate,
+    Hold,
+    Ramp,
+)
+
+
+@pytest.mark.parametrize(
+    "animation",
+    [
+        Animations([Ramp(400), Dissapate(1000)]),
+        Animations([Hold(100), Ramp(300), Animations([Hold(50), Dissapate(20)])]),
+    ],
+)
+def test_curve_matches_animation(animation):
+    curve = Curve.compile(animation)
+    progress = np.arange(-10, animation.total_time + 100)
+
+    expected = [animation.value(p) for p in progress[10:]]
+    assert curve.value(progress[10:]) == pytest.approx(expected)
+
+
+def test_animated_values_run_independently():
+    values = AnimatedValues(Animations([Ramp(100), Dissapate(100)]), 3)
+
+    values.start(np.array([True, False, False]))
+    values.tick(50)
+    values.start(np.array([False, True, False]))
+    values.tick(100)
+
+    assert values.values().tolist() == pytest.approx([0.5, 1, 0])
+    assert values.finished_animating.tolist() == [False, False, False]
+
+    values.tick(60)
+    assert values.finished_animating.tolist() == [True, False, False]
+    assert values.values().tolist() == pytest.approx([0, 0.4, 0])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from nostmack_hub.dnrgb import (
+    DnrgbDeltaEncoder,
+    DnrgbEncoder,
+    changed_runs,
+    dnrgb_encoder,
+    dnrgb_packets,
+)
+
+
+@pytest.mark.parametrize("led_count", [1, 489, 490, 840, 2000])
+def test_encoder_matches_dnrgb_packets(led_count):
+    frame = np.random.default_rng(0).integers(0, 256, (led_count, 3), dtype=np.uint8)
+    colours = list(map(tuple, frame.tolist()))
+
+    packets = [bytes(packet) for packet in DnrgbEncoder(led_count).encode(frame)]
+
+    assert packets == list(dnrgb_packets(colours))
+
+
+def test_encoder_rejects_wrong_frame():
+    with pytest.raises(ValueError):
+        DnrgbEncoder(10).encode(np.zeros((11, 3), dtype=np.uint8))
+
+
+def test_changed_runs_merges_small_gaps():
+    previous = np.zeros((100, 3), dtype=np.uint8)
+    current = previous.copy()
+    current[[2, 5, 50, 51]] = 255
+
+    assert changed_runs(previous, current, max_gap=3) == [(2, 6), (50, 52)]
+
+
+def test_changed_runs_splits_long_runs():
+    previous = np.zeros((1000, 3), dtype=np.uint8)
+    current = np.full((1000, 3), 1, dtype=np.uint8)
+
+    assert changed_runs(previous, current) == [(0, 489), (489, 978), (978, 1000)]
+
+
+def test_delta_encoder_sends_keyframes():
+    encoder = DnrgbDeltaEncoder(600, keyframe_interval=3)
+    frame = np.zeros((600, 3), dtype=np.uint8)
+
+    assert len(encoder.encode(frame)) == 2
+    # an unchanged frame only keeps WLED in realtime mode
+    [keepalive] = encoder.encode(frame)
+    assert bytes(keepalive) == bytes([4, 1, 0, 0, 0, 0, 0])
+
+    frame[10] = (1, 2, 3)
+    [packet] = encoder.encode(frame)
+    assert bytes(packet) == bytes([4, 1, 0, 10, 1, 2, 3])
+
+    assert len(encoder.encode(frame)) == 2
+
+
+@pytest.mark.parametrize("keyframe_interval", [0, -1])
+def test_delta_encoder_rejects_keyframe_interval_below_one(keyframe_interval):
+    with pytest.raises(ValueError):
+        DnrgbDeltaEncoder(10, keyframe_interval=keyframe_interval)
+    with pytest.raises(ValueError):
+        dnrgb_encoder(10, keyframe_interval=keyframe_interval)
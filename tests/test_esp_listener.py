@@ -0,0 +1,30 @@
+import asyncio
+import socket
+
+from nostmack_hub.esp_listener import (
+    ESP_MESSAGE,
+    EspBatch,
+    bind_esp_socket,
+    listen_to_esps_batched,
+)
+
+
+async def test_batched_listener_coalesces_per_esp():
+    listener = bind_esp_socket(("127.0.0.1", 0))
+    address = listener.getsockname()
+    events = listen_to_esps_batched(sock=listener)
+    batch = asyncio.ensure_future(anext(events))
+    await asyncio.sleep(0.01)
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        for id, count in [(1, 2), (2, 1), (1, -3), (2, 0)]:
+            sock.sendto(ESP_MESSAGE.pack(id, count), address)
+        await asyncio.sleep(0.01)
+
+    try:
+        assert await batch == EspBatch(
+            counts={1: 5, 2: 1},
+            datagrams={1: 2, 2: 2},
+        )
+    finally:
+        await events.aclose()
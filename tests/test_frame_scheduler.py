@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from nostmack_hub.frame_scheduler import FrameScheduler
+
+
+@pytest.mark.looptime
+async def test_frames_do_not_drift():
+    loop = asyncio.get_running_loop()
+    scheduler = FrameScheduler(0.02)
+
+    await scheduler.next_frame()
+    start = loop.time()
+    for _ in range(50):
+        await scheduler.next_frame()
+        # rendering and sending takes time
+        await asyncio.sleep(0.005)
+
+    assert loop.time() == pytest.approx(start + 50 * 0.02 + 0.005)
+    assert scheduler.late_frames == 0
+    assert scheduler.dropped_frames == 0
+
+
+@pytest.mark.looptime
+async def test_slow_frames_are_dropped():
+    scheduler = FrameScheduler(0.02)
+
+    await scheduler.next_frame()
+    assert scheduler.tick() == 0
+
+    await asyncio.sleep(0.05)
+    await scheduler.next_frame()
+
+    assert scheduler.late_frames == 1
+    assert scheduler.dropped_frames == 1
+    assert scheduler.report() == "Frames: 1 late, 1 dropped"
+    # only what happened since the last report
+    assert scheduler.report() is None
+    # animation time follows the frame deadlines, including the dropped frame
+    assert scheduler.tick() == 40
+
+    await scheduler.next_frame()
+    assert scheduler.tick() == 20
@@ -2,7 +2,7 @@ import asyncio
 
 import pytest
 
-from nostmack_hub.gear import Gear
+from nostmack_hub.gear import Gear, GearBank, discharge_gears
 
 
 async def test_gear_touched():
@@ -71,3 +71,90 @@ async def test_gear_fully_turned_fully_discharges():
         assert gear.value.inner == 0
 
         discharge_task.cancel()
+
+
+@pytest.mark.looptime
+async def test_gear_discharges_without_a_task():
+    gear = Gear(1)
+
+    gear.turned(100)
+    await asyncio.sleep(1.55)
+
+    # one step when it started discharging after 1s, then one every 0.1s
+    assert gear.value.inner == 94
+
+    # touching it again holds the value for another second
+    gear.turned(6)
+    await asyncio.sleep(0.9)
+    assert gear.value.inner == 100
+
+
+@pytest.mark.looptime
+async def test_discharging_gears_only_wake_up_at_thresholds(monkeypatch):
+    loop = asyncio.get_running_loop()
+    gears = [Gear(1) for _ in range(100)]
+    discharged = asyncio.Event()
+    gears[0].subscribe(discharged.set)
+
+    timers = 0
+    call_at = loop.call_at
+
+    def counting_call_at(*args, **kwargs):
+        nonlocal timers
+        timers += 1
+        return call_at(*args, **kwargs)
+
+    async with asyncio.TaskGroup() as tg:
+        discharge_task = tg.create_task(discharge_gears(gears))
+        start = loop.time()
+        for gear in gears:
+            gear.turned(255)
+        await asyncio.sleep(0)
+        discharged.clear()
+
+        monkeypatch.setattr(loop, "call_at", counting_call_at)
+        await discharged.wait()
+        assert loop.time() == pytest.approx(start + 90)
+        discharged.clear()
+        await discharged.wait()
+        monkeypatch.undo()
+
+        # fully discharged 255 steps of 0.1s after discharging started
+        assert loop.time() == pytest.approx(start + 90 + 25.4)
+        assert all(gear.is_discharged() for gear in gears)
+
+        discharge_task.cancel()
+
+    # one wakeup to start discharging, one when discharged
+    assert timers == 2
+
+
+@pytest.mark.looptime
+async def test_gear_bank_turns_and_discharges_gears_together():
+    bank = GearBank([1, 2, 255])
+    charged = bank[2].charged_event()
+
+    bank.turned([0, 1, 2], [100, -50, 0])
+    assert bank.settle().tolist() == [100, 100, 0]
+    assert [gear.value.inner for gear in bank] == [100, 100, 0]
+    assert not charged.is_set()
+
+    bank[2].turned(1)
+    assert bank[2].is_charged()
+    assert charged.is_set()
+
+    await asyncio.sleep(1.55)
+    assert bank.settle().tolist() == [94, 88, 255]
+
+
+def test_standalone_gear_is_the_only_view_onto_its_bank():
+    gear = Gear(3)
+    assert list(gear.bank) == [gear]
+
+
+@pytest.mark.parametrize("sensitivity", [0, -1])
+def test_gear_bank_rejects_sensitivities_below_one(sensitivity):
+    with pytest.raises(ValueError):
+        GearBank([1, sensitivity])
+    with pytest.raises(ValueError):
+        Gear(sensitivity)
@@ -0,0 +1,64 @@
+import tracemalloc
+
+import pytest
+
+from nostmack_hub.led_effect import (
+    LayeredEffect,
+    PulseOnFullChargeEffect,
+    SectoredEffect,
+    StripedEffect,
+    alternating_stripe_effect,
+    flowing_memento,
+    shimmer,
+)
+from nostmack_hub.led_effect.gamma_correction import GammaCorrection
+from nostmack_hub.led_value_calculator import LedEffectFixedCount
+
+COLOURS = [[37, 255, 90], [255, 0, 0], [0, 255, 255], [255, 80, 0], [180, 0, 255]]
+LED_COUNT = 5000
+
+
+class FixedClock:
+    def tick(self):
+        return 20
+
+
+def shimmering_sectors():
+    return LayeredEffect(
+        [
+            PulseOnFullChargeEffect(COLOURS),
+            alternating_stripe_effect(
+                StripedEffect(COLOURS),
+                5,
+                shimmer(SectoredEffect(COLOURS), 0.2),
+                20,
+            ),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "make_effect",
+    [shimmering_sectors, lambda: flowing_memento.effect(COLOURS, LED_COUNT)],
+    ids=["shimmering_sectors", "flowing_memento"],
+)
+def test_steady_state_rendering_does_not_allocate_frames(make_effect):
+    effect = LedEffectFixedCount(
+        GammaCorrection(make_effect()), LED_COUNT, clock=FixedClock()
+    )
+    gear_values = [0, 100, 200, 254, 255]
+
+    # long enough for blorp seeds to reach their steady state count
+    for _ in range(400):
+        effect.calculate(gear_values)
+
+    tracemalloc.start()
+    try:
+        for _ in range(100):
+            effect.calculate(gear_values)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # nothing as large as even the uint8 output buffer is allocated per frame
+    assert peak < effect.output.nbytes
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from nostmack_hub.gear import Gear, GearBank
+from nostmack_hub.machine import Machine
+
+
+def machine(gears):
+    return Machine(
+        esp_mapping=dict(enumerate(gears)),
+        esp_events=None,
+        wled=None,
+        effect=None,
+        sounds=None,
+        finale=None,
+        finale_duration=0,
+    )
+
+
+@pytest.mark.looptime
+async def test_charged_as_soon_as_last_gear_charges():
+    loop = asyncio.get_running_loop()
+    gears = [Gear(255), Gear(255)]
+    m = machine(gears)
+
+    check_charged = asyncio.create_task(m.check_charged())
+    start = loop.time()
+
+    await asyncio.sleep(1.25)
+    gears[0].turned(1)
+    await asyncio.sleep(0.5)
+    gears[1].turned(1)
+
+    await check_charged
+    assert loop.time() == pytest.approx(start + 1.75)
+    assert m.state.is_charged()
+
+
+@pytest.mark.looptime
+async def test_idle_machine_does_not_wake_up(monkeypatch):
+    loop = asyncio.get_running_loop()
+    gears = [Gear(1), Gear(1)]
+    gears[0].turned(100)
+    m = machine(gears)
+
+    timers = 0
+    call_at = loop.call_at
+
+    def counting_call_at(*args, **kwargs):
+        nonlocal timers
+        timers += 1
+        return call_at(*args, **kwargs)
+
+    async with asyncio.TaskGroup() as tg:
+        check_charged = tg.create_task(m.check_charged())
+        check_discharged = tg.create_task(m.check_discharged())
+        await asyncio.sleep(0)
+
+        monkeypatch.setattr(loop, "call_at", counting_call_at)
+        await asyncio.sleep(60)
+        monkeypatch.undo()
+
+        check_charged.cancel()
+        check_discharged.cancel()
+
+    # only the test's own sleep
+    assert timers == 1
+
+
+async def test_batched_turns_update_the_gear_bank():
+    bank = GearBank([1, 1, 1])
+    m = Machine(
+        esp_mapping={10: bank[0], 11: bank[1], 12: bank[2]},
+        esp_events=None,
+        wled=None,
+        effect=None,
+        sounds=None,
+        finale=None,
+        finale_duration=0,
+    )
+    assert m.gears is bank
+
+    m.esps_turned({10: 5, 12: 7, 99: 1})
+
+    assert m.state.is_charging()
+    assert bank.settle().tolist() == [5, 0, 7]
+
+
+async def test_charged_without_a_finale_that_failed_to_load():
+    class FakeWled:
+        async def set_preset(self, preset):
+            pass
+
+    finale = asyncio.get_running_loop().create_future()
+    finale.set_exception(OSError("no such file"))
+    m = machine([Gear(255)])
+    m.wled = FakeWled()
+    m.finale = finale
+    m.state.to_charging()
+    m.state.to_charged()
+
+    await m.charged()
+    assert m.state.is_initial()
@@ -0,0 +1,14 @@
+import pytest
+
+from nostmack_hub.pygame_mixer import buffer_size
+
+
+def test_buffer_size_follows_latency_mode_unless_set():
+    assert buffer_size(None, None) == 2048
+    assert buffer_size("low", None) == 256
+    assert buffer_size("low", 512) == 512
+
+
+def test_unknown_latency_mode_is_reported_even_with_a_buffer_size():
+    with pytest.raises(ValueError):
+        buffer_size("lwo", 512)
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+
+from nostmack_hub.gear import Gear, GearBank
+from nostmack_hub.led_effect import StripedEffect
+from nostmack_hub.led_value_calculator import LedEffectFixedCount
+from nostmack_hub.machine import Machine
+from nostmack_hub.render_thread import RenderThread
+
+
+class FixedClock:
+    def tick(self):
+        return 20
+
+
+async def test_render_thread_renders_latest_gear_values():
+    gears = [Gear(1), Gear(1)]
+    effect = LedEffectFixedCount(
+        StripedEffect([(255, 0, 0), (0, 0, 255)]), 4, clock=FixedClock()
+    )
+
+    def wait_for_frame(render_thread, count):
+        deadline = time.monotonic() + 5
+        while render_thread.ring.published < count:
+            assert time.monotonic() < deadline, "render thread published no frame"
+            time.sleep(0.001)
+
+    with RenderThread(gears, effect) as render_thread:
+        # black until the first frame is rendered, without waiting for it
+        assert render_thread.led_values().tolist() == [[0, 0, 0]] * 4
+        wait_for_frame(render_thread, 1)
+
+        gears[0].turned(255)
+        render_thread.led_values()
+        wait_for_frame(render_thread, 2)
+
+        frame = render_thread.led_values()
+        assert frame.tolist() == [[255, 0, 0], [0, 0, 0]] * 2
+
+        # the frame handed out is not a slot the render thread writes into
+        assert not np.shares_memory(frame, render_thread.ring.frames)
+
+
+async def test_machine_keeps_one_render_thread_across_charging_periods():
+    gears = GearBank([1, 1])
+    effect = LedEffectFixedCount(
+        StripedEffect([(255, 0, 0), (0, 0, 255)]), 4, clock=FixedClock()
+    )
+    machine = Machine(
+        esp_mapping=dict(enumerate(gears)),
+        esp_events=None,
+        wled=None,
+        effect=effect,
+        sounds=None,
+        finale=None,
+        finale_duration=0,
+        render_in_thread=True,
+    )
+
+    with machine.led_values() as first:
+        pass
+    with machine.led_values() as second:
+        pass
+
+    assert first is second
+    assert first.thread.is_alive()
+    first.stop()
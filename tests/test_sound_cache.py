@@ -0,0 +1,52 @@
+import wave
+
+import numpy as np
+import pygame.mixer
+import pytest
+
+from nostmack_hub.sound_cache import SoundCache
+
+
+@pytest.fixture
+def mixer(monkeypatch):
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init(frequency=44100)
+    yield
+    pygame.mixer.quit()
+
+
+def write_wav(path, frequency=22050):
+    samples = (np.sin(np.arange(frequency) / 10) * 8000).astype(np.int16)
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(frequency)
+        file.writeframes(samples.tobytes())
+
+
+def test_cached_sound_matches_decoded_sound(mixer, tmp_path):
+    path = tmp_path / "sound.wav"
+    write_wav(path)
+    cache = SoundCache(tmp_path / "cache")
+
+    decoded = pygame.mixer.Sound(path)
+    first = cache.load(path)
+    (cached,) = (tmp_path / "cache").iterdir()
+    second = cache.load(path)
+
+    assert first.get_raw() == decoded.get_raw()
+    assert second.get_raw() == decoded.get_raw()
+    assert cached.read_bytes() == decoded.get_raw()
+
+
+def test_changed_sound_is_decoded_again(mixer, tmp_path):
+    path = tmp_path / "sound.wav"
+    cache = SoundCache(tmp_path / "cache")
+
+    write_wav(path, frequency=22050)
+    cache.load(path)
+    write_wav(path, frequency=11025)
+    sound = cache.load(path)
+
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+    assert sound.get_length() == pytest.approx(1)
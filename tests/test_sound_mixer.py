@@ -0,0 +1,141 @@
+import asyncio
+
+import numpy as np
+import pygame.mixer
+import pytest
+
+from nostmack_hub.sound_mixer import SoftwareMixer
+
+
+@pytest.fixture
+def mixer(monkeypatch):
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+    yield SoftwareMixer(block_size=64)
+    pygame.mixer.quit()
+
+
+def constant_sound(value, frames):
+    return pygame.mixer.Sound(buffer=np.full((frames, 2), value, np.int16).tobytes())
+
+
+def test_volume_changes_ramp_over_one_block(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    voice.play(loops=-1)
+    voice.set_volume(0.5)
+
+    # applied at once before the voice is first mixed
+    assert np.all(mixer.mix_block() == 500)
+
+    voice.set_volume(1)
+    block = mixer.mix_block()[:, 0]
+    assert np.all(np.diff(block) >= 0)
+    assert block[0] > 500
+    assert block[-1] == 1000
+    # the loop wraps around
+    assert np.all(mixer.mix_block() == 1000)
+
+
+def test_sounds_played_once_stop_at_their_end(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    voice.play()
+
+    assert np.all(mixer.mix_block() == 1000)
+    block = mixer.mix_block()
+    assert np.all(block[:36] == 1000)
+    assert np.all(block[36:] == 0)
+    assert not mixer.playing[voice.index]
+
+
+def test_faded_out_voices_stop(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    voice.play(loops=-1)
+    mixer.mix_block()
+
+    # 64 frames at 44.1kHz
+    voice.fadeout(64 * 1000 // 44100 + 1)
+    mixer.mix_block()
+    mixer.mix_block()
+    assert not mixer.playing[voice.index]
+    assert np.all(mixer.mix_block() == 0)
+
+
+def test_many_voices_mix_into_one_saturated_stream(mixer):
+    voices = [mixer.voice(constant_sound(1000, 100)) for _ in range(40)]
+    for i, voice in enumerate(voices):
+        voice.play(loops=-1)
+        voice.set_volume(0.5 if i < 20 else 0)
+
+    assert np.all(mixer.mix_block() == 10000)
+
+    for voice in voices:
+        voice.set_volume(1)
+    mixer.mix_block()
+    assert np.all(mixer.mix_block() == 32767)
+
+
+def test_sounds_repeat_as_often_as_asked(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    # played three times, 300 frames
+    voice.play(loops=2)
+
+    blocks = np.concatenate([mixer.mix_block() for _ in range(5)])
+    assert np.all(blocks[:300] == 1000)
+    assert np.all(blocks[300:] == 0)
+    assert not mixer.playing[voice.index]
+
+
+def test_samples_are_kept_as_16_bit(mixer):
+    mixer.voice(constant_sound(1000, 100))
+    assert mixer.samples[0].dtype == np.int16
+
+
+def test_queued_sound_covers_several_blocks(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    voice.play(loops=-1)
+
+    sound = mixer.mix_queued()
+    assert sound.get_length() * 44100 == pytest.approx(2 * 64)
+
+
+def test_a_sound_played_again_overlaps_itself(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    voice.play()
+    mixer.mix_block()
+    voice.play()
+
+    # the rest of the first play and the start of the second
+    block = mixer.mix_block()
+    assert np.all(block[:36] == 2000)
+    assert np.all(block[36:] == 1000)
+    block = mixer.mix_block()
+    assert np.all(block[:36] == 1000)
+    assert np.all(block[36:] == 0)
+
+    # finished plays are reused
+    voice.play()
+    assert len(mixer.samples) == 2
+
+
+async def test_idle_mixer_mixes_nothing_until_played(mixer):
+    voice = mixer.voice(constant_sound(1000, 100))
+    mixed = 0
+    mix_queued = mixer.mix_queued
+
+    def counted():
+        nonlocal mixed
+        mixed += 1
+        return mix_queued()
+
+    mixer.mix_queued = counted
+    running = asyncio.create_task(mixer.run())
+    await asyncio.sleep(0.05)
+    assert mixed == 0
+
+    voice.play()
+    await asyncio.sleep(0.05)
+    # the mixer is idle again once the sound has been mixed
+    assert 0 < mixed <= 2
+    running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from nostmack_hub.gear import GearBank
+from nostmack_hub.sounds import Sounds
+
+
+class FakeSound:
+    def __init__(self):
+        self.volumes = []
+        self.plays = 0
+
+    def play(self, loops=0):
+        self.plays += 1
+
+    def set_volume(self, volume):
+        self.volumes.append(volume)
+
+    def fadeout(self, time):
+        pass
+
+
+@pytest.mark.looptime
+async def test_volume_follows_gear_values_only_when_they_change():
+    gears = GearBank([51, 51])
+    loops = [FakeSound(), FakeSound()]
+    ding = FakeSound()
+    sounds = Sounds(list(gears), loops, ding)
+
+    play_sounds = asyncio.create_task(sounds.play_sounds())
+    await asyncio.sleep(10)
+    # both loops started silent, and nothing changed since
+    assert [sound.volumes for sound in loops] == [[0], [0]]
+
+    gears[0].turned(5)
+    await asyncio.sleep(0)
+    (sound,) = [sound for sound in loops if sound.volumes[-1] == 1]
+    assert ding.plays == 1
+
+    # charged gears hold for 90s, then step down every 0.1s until silent
+    await asyncio.sleep(90 + 0.45)
+    assert sound.volumes == [0, 1, 0.8, 0.6, 0.4, 0.2, 0]
+    await asyncio.sleep(60)
+    assert len(sound.volumes) == 7
+
+    play_sounds.cancel()
+    await play_sounds
+
+
+@pytest.mark.looptime
+async def test_sounds_loaded_later_are_picked_up():
+    gears = GearBank([51, 51])
+    sounds = Sounds(list(gears), [])
+
+    play_sounds = asyncio.create_task(sounds.play_sounds())
+    gears[0].turned(5)
+    await asyncio.sleep(1)
+
+    # the charged gear gets a sound as soon as one has loaded, at its volume
+    loop = FakeSound()
+    sounds.add_sound(loop)
+    await asyncio.sleep(0)
+    assert loop.plays == 1
+    assert loop.volumes == [0, 1]
+
+    ding = FakeSound()
+    sounds.set_ding(ding)
+    gears[1].turned(5)
+    await asyncio.sleep(0)
+    assert ding.plays == 1
+
+    play_sounds.cancel()
+    await play_sounds
@@ -0,0 +1,40 @@
+import socket
+
+from nostmack_hub import udp
+from nostmack_hub.udp import sender
+
+
+def bound_socket():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+async def test_failing_socket_does_not_stop_the_others():
+    with bound_socket() as closed, bound_socket() as receiver:
+        closed_addr = closed.getsockname()
+        closed.close()
+        receiver.settimeout(1)
+
+        async with sender([closed_addr, receiver.getsockname()]) as datagrams:
+            # the first send to a closed port is refused on the next one
+            for packet in [b"a", b"b", b"c"]:
+                await datagrams.send_all([packet])
+
+        assert [receiver.recv(16) for _ in range(3)] == [b"a", b"b", b"c"]
+
+
+async def test_unresolvable_address_is_retried_without_stopping_the_others(
+    monkeypatch,
+):
+    monkeypatch.setattr(udp, "RECONNECT_DELAY", 0)
+    with bound_socket() as receiver:
+        receiver.settimeout(1)
+
+        async with sender([("mirror.invalid", 1), receiver.getsockname()]) as datagrams:
+            await datagrams.send_all([b"a"])
+            assert datagrams.failing == {0}
+            # the next frame tries the mirror again
+            assert datagrams.connecting[0] is not None
+
+        assert receiver.recv(16) == b"a"
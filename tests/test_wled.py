@@ -0,0 +1,82 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from nostmack_hub.wled import WledController, WledSegment, check_segments
+
+
+def controller():
+    return WledController("wled.local", [WledSegment(0, 4, "wled.local")], None)
+
+
+def test_controller_keeps_its_own_copy_of_the_shown_frame():
+    wled = controller()
+    leds = np.zeros((4, 3), dtype=np.uint8)
+
+    wled.show(leds)
+    leds[:] = 255
+
+    assert wled.leds.tolist() == [[0, 0, 0]] * 4
+
+
+@pytest.mark.looptime
+async def test_controller_retries_after_failing():
+    wled = controller()
+    attempts = 0
+
+    async def send_frames():
+        nonlocal attempts
+        attempts += 1
+        raise OSError("unreachable")
+
+    wled.send_frames = send_frames
+    sending = asyncio.create_task(wled.keep_sending())
+    await asyncio.sleep(1)
+    sending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await sending
+
+    assert attempts > 2
+
+
+@pytest.mark.looptime
+async def test_controller_reports_a_failure_once(capsys):
+    wled = controller()
+
+    async def send_frames():
+        raise OSError("unreachable")
+
+    wled.send_frames = send_frames
+    sending = asyncio.create_task(wled.keep_sending())
+    await asyncio.sleep(1)
+    sending.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await sending
+
+    assert capsys.readouterr().out.count("failed") == 1
+
+
+@pytest.mark.parametrize(
+    "segment",
+    [
+        WledSegment(0, 5, "wled.local"),
+        WledSegment(2, 2, "wled.local"),
+        WledSegment(-1, 2, "wled.local"),
+        WledSegment(0, 4, "wled.local", offset=2**16 - 3),
+        WledSegment(0, 4, "wled.local", offset=-1),
+    ],
+)
+def test_segments_outside_the_frame_or_controller_are_rejected(segment):
+    with pytest.raises(ValueError):
+        check_segments([segment], 4)
+
+
+def test_segments_up_to_the_last_led_are_accepted():
+    check_segments(
+        [
+            WledSegment(0, 2, "a.local"),
+            WledSegment(2, 4, "b.local", offset=2**16 - 2),
+        ],
+        4,
+    )